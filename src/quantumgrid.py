@@ -16,28 +16,65 @@ Version: 3.5.0 (Optimized & Aligned)
 License: MIT
 """
 
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # importing must not print
+
 import pygame
 import random
-import math
 import json
+import hashlib
+import math
 import sys
+import time
+import argparse
+import cProfile
+import csv
+import getpass
+import sqlite3
+import tracemalloc
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Tuple, Optional, Set, Dict
+from typing import Callable, List, Tuple, Optional, Dict, Set
 
-VERSION = "3.5.0"
+from quantumgrid_board import Board
+from quantumgrid_engine import GameEngine, GRID_SIZE, MAX_GRID_SIZE, MIN_TILE, MAX_TILE
+from quantumgrid_history import GameHistory, record_game
+from quantumgrid_persistence import SaveWriter
+import quantumgrid_snapshot as snapshot
 
-pygame.init()
+VERSION = "3.5.0"
 
 # Constants
 WINDOW_WIDTH = 1400
 WINDOW_HEIGHT = 900
 FPS = 120
-GRID_SIZE = 7
 CELL_SIZE = 90
 GRID_PADDING = 10
+GRID_VIEW = GRID_SIZE * (CELL_SIZE + GRID_PADDING)  # square grid area; larger boards scroll in it
+LARGE_BOARD_MIN = 15  # --board-size is 7 or 15-101
+ZOOM_LEVELS = (CELL_SIZE, 64, 42, 30, 20, 14, 9, 5)  # cell sizes, largest first
+MIN_DIGIT_CELL = 14  # smaller cells show their value as a shade instead of a digit
+SCROLL_CELLS = 3  # cells an arrow key scrolls by
+BOARD_IMAGE_CELLS = 1024  # boards with more cells than this are drawn from one image
+BOARD_IMAGE_MAX = 2304  # ... at zoom levels where that image is at most this wide
+BOARD_IMAGE_KEY = (255, 0, 255)  # transparent gaps between cells in the board image
 CLICK_COOLDOWN = 20  # Further reduced for even faster response
+HIGHLIGHT_TIME = 1.0  # seconds a matched cell stays gold
+CELL_RECTS_MAX = 64  # more changed cells than this repaint the grid area as one rect
+DIRTY_RECTS_MAX = 8  # more dirty regions than this are repainted as their union, in one pass
+POPUP_TIME = 2.0  # seconds the +gain and combo popups stay up
 
 SAVE_FILE = Path("quantumgrid_save.json")
+HISTORY_FILE = SAVE_FILE.with_name("quantumgrid_history.db")
+LEADERBOARD_SIZE = 5  # best games listed on the menu
+SNAPSHOT_FILE = SAVE_FILE.with_name("quantumgrid_snapshot.bin")  # the game in progress
+ATLAS_WIDTH = 2048
+CACHE_BUDGET_MB = 48  # cached surfaces beyond this are evicted, oldest first
+FRAME_HISTORY = 600  # frames kept by the frame profiler
+OVERLAY_REFRESH = 0.25  # seconds between frame profiler overlay repaints
+CAPTURE_TOP = 25  # allocation sites listed per capture
 
 # Colors
 class Colors:
@@ -54,6 +91,23 @@ class Colors:
     RED = (255, 50, 50)
     OVERLAY = (0, 0, 0, 180)
 
+def atlas_files(group: str) -> Tuple[Path, Path]:
+    """Image and index paths of a text group's atlas, next to the save file"""
+    stem = f"quantumgrid_text_atlas_{group}"
+    return SAVE_FILE.with_name(stem + ".png"), SAVE_FILE.with_name(stem + ".json")
+
+# Glyphs a number can be drawn from, and the (font, color) of every
+# number on each text group's screens
+NUMBER_GLYPHS = "0123456789,+-"
+NUMBER_STYLES = {
+    'menu': [('medium', Colors.GOLD), ('tiny', Colors.NEON_GREEN), ('small', Colors.GOLD),
+             ('small', Colors.NEON_GREEN)],
+    'game': [('large', Colors.WHITE), ('large', Colors.NEON_GREEN), ('small', Colors.NEON_PINK),
+             ('small', Colors.NEON_GREEN), ('tiny', Colors.GOLD), ('medium', Colors.WHITE),
+             ('medium', Colors.NEON_GREEN)],
+    'tutorial': [],
+}
+
 class GameState:
     MENU = 1
     PLAYING = 2
@@ -61,12 +115,99 @@ class GameState:
     GAME_OVER = 4
     TUTORIAL = 5
 
+def surface_bytes(surface: pygame.Surface) -> int:
+    """Pixel memory owned by a surface; subsurfaces share their parent's"""
+    if surface.get_parent() is not None:
+        return 0
+    return surface.get_pitch() * surface.get_height()
+
+class SurfaceCache:
+    """Every cached surface in the game, held to a byte budget
+
+    Entries are evicted least recently used first once the total pixel
+    memory exceeds the budget. Pinned entries (pre-rendered text, the
+    background) are counted but never evicted, so only they can keep the
+    total above the budget.
+    """
+    def __init__(self, budget: int = CACHE_BUDGET_MB * 1024 * 1024):
+        self.budget = budget
+        self.entries: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        self.pinned: Dict[tuple, pygame.Surface] = {}
+        self.sizes: Dict[tuple, int] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: tuple) -> Optional[pygame.Surface]:
+        surface = self.pinned.get(key)
+        if surface is None:
+            surface = self.entries.get(key)
+            if surface is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+        self.hits += 1
+        return surface
+    
+    def put(self, key: tuple, surface: pygame.Surface, pin: bool = False) -> pygame.Surface:
+        self.discard(key)
+        size = surface_bytes(surface)
+        self.sizes[key] = size
+        self.bytes += size
+        if pin:
+            self.pinned[key] = surface
+        else:
+            self.entries[key] = surface
+            self._evict()
+        return surface
+    
+    def get_or_create(self, key: tuple, create: Callable[[], pygame.Surface],
+                      pin: bool = False) -> pygame.Surface:
+        surface = self.get(key)
+        if surface is None:
+            surface = self.put(key, create(), pin)
+        return surface
+    
+    def discard(self, key: tuple):
+        if key in self.sizes:
+            self.bytes -= self.sizes.pop(key)
+            self.pinned.pop(key, None)
+            self.entries.pop(key, None)
+    
+    def _evict(self):
+        while self.bytes > self.budget and self.entries:
+            key, _ = self.entries.popitem(last=False)
+            self.bytes -= self.sizes.pop(key)
+            self.evictions += 1
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self.entries) + len(self.pinned),
+            'pinned': len(self.pinned),
+            'bytes': self.bytes,
+            'budget': self.budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
 class TextCache:
-    """Pre-render all text to avoid slow font.render() calls"""
-    def __init__(self):
-        self.cache = {}
+    """Pre-render all text to avoid slow font.render() calls
+
+    Text is grouped by the screen that first needs it ('menu', 'game',
+    'tutorial'); only the menu group is prepared up front and the others
+    on first use (require). Each group's surfaces are packed into an atlas
+    image (plus a JSON index of where each string sits) the first time the
+    game runs; later launches load the atlas and slice it instead of
+    rendering every string.
+    """
+    def __init__(self, surfaces: SurfaceCache, groups: Tuple[str, ...] = ('menu',)):
+        self.surfaces = surfaces
+        self.loaded = set()
         self._init_fonts()
-        self._prerender_all()
+        for group in groups:
+            self.require(group)
     
     def _init_fonts(self):
         self.title_font = pygame.font.Font(None, 72)
@@ -75,168 +216,498 @@ class TextCache:
         self.small_font = pygame.font.Font(None, 28)
         self.tiny_font = pygame.font.Font(None, 20)
     
-    def _prerender_all(self):
-        """Pre-render ALL text that will be used in the game"""
-        print("  Pre-rendering text...")
-        
-        # Numbers 0-9 in different fonts and colors
-        for num in range(10):
-            self.cache[('large', str(num), Colors.WHITE)] = self.large_font.render(str(num), True, Colors.WHITE)
-            self.cache[('medium', str(num), Colors.WHITE)] = self.medium_font.render(str(num), True, Colors.WHITE)
-            self.cache[('small', str(num), Colors.WHITE)] = self.small_font.render(str(num), True, Colors.WHITE)
-        
-        # Common UI text
-        ui_texts = [
-            ('title', 'QUANTUMGRID', Colors.NEON_BLUE),
-            ('title', 'TUTORIAL', Colors.NEON_GREEN),
-            ('title', 'PAUSED', Colors.NEON_YELLOW),
-            ('title', 'GAME OVER', Colors.NEON_PINK),
-            ('small', 'Strategic Puzzle Game', Colors.NEON_GREEN),
-            ('medium', 'SCORE', Colors.NEON_YELLOW),
-            ('medium', 'NEXT TILES', Colors.NEON_BLUE),
-            ('tiny', 'QUANTUM ENERGY', Colors.NEON_PURPLE),
-            ('medium', 'NEW HIGH SCORE!', Colors.GOLD),
-            ('medium', 'BOARD FULL!', Colors.NEON_PINK),
-            ('medium', 'No moves remaining!', Colors.WHITE),
-            ('medium', 'PLAY', Colors.WHITE),
-            ('medium', 'TUTORIAL', Colors.WHITE),
-            ('medium', 'QUIT', Colors.WHITE),
-            ('medium', 'RESUME', Colors.WHITE),
-            ('medium', 'RESTART', Colors.WHITE),
-            ('medium', 'MAIN MENU', Colors.WHITE),
-            ('medium', 'PLAY AGAIN', Colors.WHITE),
-            ('small', 'NEW GAME', Colors.WHITE),
-            ('small', 'PREVIOUS', Colors.WHITE),
-            ('small', 'NEXT', Colors.WHITE),
-            ('small', 'START PLAYING', Colors.WHITE),
-            ('tiny', 'PAUSE', Colors.WHITE),
-            ('tiny', 'HELP', Colors.WHITE),
-        ]
-        
-        for font_name, text, color in ui_texts:
-            font = getattr(self, f'{font_name}_font')
-            self.cache[(font_name, text, color)] = font.render(text, True, color)
-        
-        # Tutorial content
-        tutorial_texts = [
-            'How to Play', 'Advanced Features', 'Tips Tricks',
-            'Click on any empty cell to place the current tile (shown in gold)',
-            'Create patterns of 3 or more tiles in a row, column, or diagonal',
-            'Different patterns give different points:',
-            '  Sum equals 15: +50 points',
-            '  Product is a prime number: +75 points',
-            '  Fibonacci sequence (e.g., 1-1-2 or 2-3-5): +100 points',
-            '  All powers of 2 (e.g., 1-2-4 or 2-4-8): +125 points',
-            'COMBO MULTIPLIER:',
-            'Create multiple patterns in one move to multiply your score!',
-            'QUANTUM ENERGY:',
-            'Press Q to use quantum power and gain +5 extra moves',
-            'Earn more quantum energy by leveling up',
-            'LEVEL UP:',
-            'Every 1000 points = new level + 10 bonus moves + quantum energy',
-            "Plan ahead using the 'Next Tiles' preview",
-            'Look for Fibonacci sequences: 1-1-2, 1-2-3, 2-3-5, 3-5-8',
-            'Powers of 2 are: 1, 2, 4, 8 (highest scoring pattern!)',
-            'Save quantum powers for when you\'re running low on moves',
-            'Press F to toggle FPS display for performance monitoring',
-            '',
-        ]
-        
-        for text in tutorial_texts:
-            self.cache[('large', text, Colors.NEON_YELLOW)] = self.large_font.render(text, True, Colors.NEON_YELLOW)
-            self.cache[('small', text, Colors.WHITE)] = self.small_font.render(text, True, Colors.WHITE)
-        
-        # Rules panel
-        rules = [
-            "3+ in a row: Sum=15 (+50) | Prime Product (+75) | Fibonacci (+100) | Powers of 2 (+125)",
-            "Multiple patterns = COMBO MULTIPLIER! | Press Q for Quantum Power (+5 moves)",
-            "Level up every 1000 points | Press F to toggle FPS | Press H for help"
-        ]
-        for rule in rules:
-            self.cache[('tiny', rule, Colors.NEON_GREEN)] = self.tiny_font.render(rule, True, Colors.NEON_GREEN)
-        
-        # Page indicators
-        for i in range(1, 4):
-            text = f"Page {i} of 3"
-            self.cache[('tiny', text, Colors.NEON_BLUE)] = self.tiny_font.render(text, True, Colors.NEON_BLUE)
-        
-        # Version
-        self.cache[('tiny', f'v{VERSION}', Colors.DARK_PURPLE)] = self.tiny_font.render(f'v{VERSION}', True, Colors.DARK_PURPLE)
+    def _prerender_entries(self, group: str) -> List[Tuple[str, str, Tuple[int, int, int]]]:
+        """Every (font, text, color) that the group's screens will use"""
+        entries = []
+        
+        if group == 'menu':
+            entries.extend([
+                ('title', 'QUANTUMGRID', Colors.NEON_BLUE),
+                ('small', 'Strategic Puzzle Game', Colors.NEON_GREEN),
+                ('medium', 'PLAY', Colors.WHITE),
+                ('medium', 'TUTORIAL', Colors.WHITE),
+                ('medium', 'QUIT', Colors.WHITE),
+                ('tiny', f'v{VERSION}', Colors.DARK_PURPLE),
+                ('medium', 'High Score: ', Colors.GOLD),
+                ('medium', 'TOP SCORES', Colors.NEON_PURPLE),
+                ('small', 'Lv ', Colors.NEON_GREEN),
+                ('tiny', 'FPS: ', Colors.NEON_GREEN),
+                # Frame profiler overlay
+                ('tiny', 'phase (us)', Colors.GOLD),
+                ('tiny', 'p50', Colors.GOLD),
+                ('tiny', 'p95', Colors.GOLD),
+                ('tiny', 'p99', Colors.GOLD),
+                ('tiny', 'frame', Colors.WHITE),
+                ('tiny', 'events', Colors.WHITE),
+                ('tiny', 'update', Colors.WHITE),
+                ('tiny', 'draw', Colors.WHITE),
+                ('tiny', 'present', Colors.WHITE),
+            ])
+            entries.extend(('small', f'{rank}.', Colors.NEON_BLUE)
+                           for rank in range(1, LEADERBOARD_SIZE + 1))
+        
+        elif group == 'game':
+            # Panels, overlays and their buttons
+            entries.extend([
+                ('title', 'PAUSED', Colors.NEON_YELLOW),
+                ('title', 'GAME OVER', Colors.NEON_PINK),
+                ('medium', 'SCORE', Colors.NEON_YELLOW),
+                ('medium', 'NEXT TILES', Colors.NEON_BLUE),
+                ('tiny', 'QUANTUM ENERGY', Colors.NEON_PURPLE),
+                ('medium', 'NEW HIGH SCORE!', Colors.GOLD),
+                ('medium', 'BOARD FULL!', Colors.NEON_PINK),
+                ('medium', 'No moves remaining!', Colors.WHITE),
+                ('medium', 'RESUME', Colors.WHITE),
+                ('medium', 'RESTART', Colors.WHITE),
+                ('medium', 'MAIN MENU', Colors.WHITE),
+                ('medium', 'PLAY AGAIN', Colors.WHITE),
+                ('small', 'NEW GAME', Colors.WHITE),
+                ('tiny', 'PAUSE', Colors.WHITE),
+                ('tiny', 'HELP', Colors.WHITE),
+                # Labels in front of composed numbers
+                ('small', 'LEVEL ', Colors.NEON_PINK),
+                ('small', 'MOVES: ', Colors.NEON_GREEN),
+                ('small', 'MOVES: ', Colors.NEON_PINK),
+                ('tiny', 'Best: ', Colors.GOLD),
+                ('medium', 'Final Score: ', Colors.WHITE),
+                ('medium', 'Level Reached: ', Colors.NEON_GREEN),
+            ])
+            
+            # Rules panel
+            rules = [
+                "3+ in a row: Sum=15 (+50) | Prime Product (+75) | Fibonacci (+100) | Powers of 2 (+125)",
+                "Multiple patterns = COMBO MULTIPLIER! | Press Q for Quantum Power (+5 moves)",
+                "Level up every 1000 points | Press F to toggle FPS | Press H for help"
+            ]
+            for rule in rules:
+                entries.append(('tiny', rule, Colors.NEON_GREEN))
+        
+        elif group == 'tutorial':
+            entries.extend([
+                ('title', 'TUTORIAL', Colors.NEON_GREEN),
+                ('small', 'PREVIOUS', Colors.WHITE),
+                ('small', 'NEXT', Colors.WHITE),
+                ('small', 'START PLAYING', Colors.WHITE),
+            ])
+            
+            # Tutorial content
+            tutorial_texts = [
+                'How to Play', 'Advanced Features', 'Tips Tricks',
+                'Click on any empty cell to place the current tile (shown in gold)',
+                'Create patterns of 3 or more tiles in a row, column, or diagonal',
+                'Different patterns give different points:',
+                '  Sum equals 15: +50 points',
+                '  Product is a prime number: +75 points',
+                '  Fibonacci sequence (e.g., 1-1-2 or 2-3-5): +100 points',
+                '  All powers of 2 (e.g., 1-2-4 or 2-4-8): +125 points',
+                'COMBO MULTIPLIER:',
+                'Create multiple patterns in one move to multiply your score!',
+                'QUANTUM ENERGY:',
+                'Press Q to use quantum power and gain +5 extra moves',
+                'Earn more quantum energy by leveling up',
+                'LEVEL UP:',
+                'Every 1000 points = new level + 10 bonus moves + quantum energy',
+                "Plan ahead using the 'Next Tiles' preview",
+                'Look for Fibonacci sequences: 1-1-2, 1-2-3, 2-3-5, 3-5-8',
+                'Powers of 2 are: 1, 2, 4, 8 (highest scoring pattern!)',
+                'Save quantum powers for when you\'re running low on moves',
+                'Press F to toggle FPS display for performance monitoring',
+                '',
+            ]
+            
+            for text in tutorial_texts:
+                entries.append(('large', text, Colors.NEON_YELLOW))
+                entries.append(('small', text, Colors.WHITE))
+            
+            # Page indicators
+            for i in range(1, 4):
+                text = f"Page {i} of 3"
+                entries.append(('tiny', text, Colors.NEON_BLUE))
         
-        # Pre-render common level/score/moves text
-        for i in range(1, 101):
-            self.cache[('small', f'LEVEL {i}', Colors.NEON_PINK)] = self.small_font.render(f'LEVEL {i}', True, Colors.NEON_PINK)
+        else:
+            raise ValueError(f"Unknown text group {group!r}")
         
-        for i in range(0, 201):
-            self.cache[('small', f'MOVES: {i}', Colors.NEON_GREEN)] = self.small_font.render(f'MOVES: {i}', True, Colors.NEON_GREEN)
-            self.cache[('small', f'MOVES: {i}', Colors.NEON_PINK)] = self.small_font.render(f'MOVES: {i}', True, Colors.NEON_PINK)
+        # Glyphs for the numbers drawn on these screens (NumberRenderer)
+        for font_name, color in NUMBER_STYLES[group]:
+            for glyph in NUMBER_GLYPHS:
+                entries.append((font_name, glyph, color))
         
-        print("  Text cache ready!")
+        return entries
+    
+    def require(self, group: str) -> bool:
+        """Make sure a group's text is cached; True if it had to be loaded now"""
+        if group in self.loaded:
+            return False
+        entries = self._prerender_entries(group)
+        key = self._atlas_key(entries)
+        image_file, index_file = atlas_files(group)
+        if self._load_atlas(key, group, image_file, index_file):
+            print(f"  Text atlas '{group}' loaded!")
+        else:
+            print(f"  Pre-rendering '{group}' text...")
+            rendered = {}
+            for font_name, text, color in entries:
+                font = getattr(self, f'{font_name}_font')
+                rendered[(font_name, text, color)] = font.render(text, True, color).convert_alpha()
+                self.surfaces.put(('text', font_name, text, color), rendered[(font_name, text, color)],
+                                  pin=True)
+            self._save_atlas(key, rendered, image_file, index_file)
+        self.loaded.add(group)
+        return True
+    
+    def _atlas_key(self, entries: List[Tuple[str, str, Tuple[int, int, int]]]) -> Dict:
+        """Anything that changes how the text renders invalidates the atlas"""
+        digest = hashlib.md5(json.dumps(entries).encode('utf-8')).hexdigest()
+        return {
+            'version': VERSION,
+            'pygame': pygame.version.ver,
+            'sdl': list(pygame.get_sdl_version()),
+            'font': pygame.font.get_default_font(),
+            'entries': digest,
+        }
+    
+    def _load_atlas(self, key: Dict, group: str, image_file: Path, index_file: Path) -> bool:
+        try:
+            if not (index_file.exists() and image_file.exists()):
+                return False
+            with open(index_file, 'r') as f:
+                index = json.load(f)
+            if index.get('key') != key:
+                return False
+            atlas = pygame.image.load(str(image_file)).convert_alpha()
+            cache = {}
+            for font_name, text, color, x, y, w, h in index['entries']:
+                if w and h:
+                    surface = atlas.subsurface((x, y, w, h))
+                else:
+                    surface = pygame.Surface((w, h), pygame.SRCALPHA)
+                cache[('text', font_name, text, tuple(color))] = surface
+        except (OSError, ValueError, KeyError, TypeError, pygame.error) as e:
+            print(f"  Ignoring text atlas: {e}")
+            return False
+        # The atlas owns the pixels; its slices are pinned at no extra cost
+        self.surfaces.put(('atlas', group), atlas, pin=True)
+        for cache_key, surface in cache.items():
+            self.surfaces.put(cache_key, surface, pin=True)
+        return True
+    
+    def _save_atlas(self, key: Dict, rendered: Dict[Tuple[str, str, Tuple[int, int, int]], pygame.Surface],
+                    image_file: Path, index_file: Path):
+        """Shelf-pack the rendered entries into one image and write it with its index"""
+        # Tallest first so each shelf wastes little height
+        order = sorted(rendered, key=lambda e: -rendered[e].get_height())
+        placed = []
+        x = y = shelf_height = 0
+        for entry in order:
+            w, h = rendered[entry].get_size()
+            if x + w > ATLAS_WIDTH and x > 0:
+                x, y, shelf_height = 0, y + shelf_height + 1, 0
+            placed.append((entry, x, y, w, h))
+            x += w + 1
+            shelf_height = max(shelf_height, h)
+        
+        atlas = pygame.Surface((ATLAS_WIDTH, max(1, y + shelf_height)), pygame.SRCALPHA)
+        atlas.fill((0, 0, 0, 0))
+        for entry, x, y, w, h in placed:
+            # MAX onto transparent black copies the pixels, alpha included
+            atlas.blit(rendered[entry], (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+        
+        index = {
+            'key': key,
+            'entries': [[font_name, text, list(color), x, y, w, h]
+                        for (font_name, text, color), x, y, w, h in placed],
+        }
+        image_tmp = image_file.with_name(image_file.stem + '.tmp.png')
+        index_tmp = index_file.with_name(index_file.name + '.tmp')
+        try:
+            pygame.image.save(atlas, str(image_tmp))
+            with open(index_tmp, 'w') as f:
+                json.dump(index, f)
+            os.replace(image_tmp, image_file)
+            os.replace(index_tmp, index_file)
+        except (OSError, pygame.error) as e:
+            print(f"  Could not write text atlas: {e}")
     
     def get(self, font_name: str, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
         """Get cached text or render on demand"""
-        key = (font_name, text, color)
-        if key not in self.cache:
+        key = ('text', font_name, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
             font = getattr(self, f'{font_name}_font')
-            self.cache[key] = font.render(text, True, color)
-        return self.cache[key]
+            surface = self.surfaces.put(key, font.render(text, True, color).convert_alpha())
+        return surface
+
+class NumberRenderer:
+    """Draws numbers from per-glyph surfaces instead of rendering each value
+
+    Digits, comma and sign come from the text cache once per font and
+    color; a number, with optional fixed labels before and after it, is then
+    placed with one Surface.blits call, so neither the cost nor the cache grows
+    with the value.
+    """
+    def __init__(self, text_cache: TextCache):
+        self.text_cache = text_cache
+        self._glyph_sets: Dict[Tuple[str, Tuple[int, int, int]], Dict[str, pygame.Surface]] = {}
+    
+    def _glyphs(self, font_name: str, color: Tuple[int, int, int]) -> Dict[str, pygame.Surface]:
+        glyphs = self._glyph_sets.get((font_name, color))
+        if glyphs is None:
+            glyphs = {glyph: self.text_cache.get(font_name, glyph, color) for glyph in NUMBER_GLYPHS}
+            self._glyph_sets[(font_name, color)] = glyphs
+        return glyphs
+    
+    def _layout(self, font_name: str, value: int, color: Tuple[int, int, int],
+                pos: Tuple[int, int], label: str, sign: bool, anchor: str,
+                suffix: str = '') -> Tuple[List[pygame.Surface], pygame.Rect]:
+        glyphs = self._glyphs(font_name, color)
+        parts = [self.text_cache.get(font_name, label, color)] if label else []
+        parts.extend(glyphs[glyph] for glyph in (f"{value:+,}" if sign else f"{value:,}"))
+        if suffix:
+            parts.append(self.text_cache.get(font_name, suffix, color))
+        
+        rect = pygame.Rect(0, 0, sum(part.get_width() for part in parts),
+                           max(part.get_height() for part in parts))
+        setattr(rect, anchor, pos)
+        return parts, rect
+    
+    def get_rect(self, font_name: str, value: int, color: Tuple[int, int, int],
+                 pos: Tuple[int, int], label: str = '', sign: bool = False,
+                 anchor: str = 'center', suffix: str = '') -> pygame.Rect:
+        """Where draw() would put the number, without drawing it"""
+        return self._layout(font_name, value, color, pos, label, sign, anchor, suffix)[1]
+    
+    def draw(self, target: pygame.Surface, font_name: str, value: int, color: Tuple[int, int, int],
+             pos: Tuple[int, int], label: str = '', sign: bool = False,
+             anchor: str = 'center', suffix: str = '') -> pygame.Rect:
+        """Blit label + value (with thousands separators) + suffix with its anchor point at pos"""
+        parts, rect = self._layout(font_name, value, color, pos, label, sign, anchor, suffix)
+        x = rect.x
+        sequence = []
+        for part in parts:
+            sequence.append((part, (x, rect.y)))
+            x += part.get_width()
+        target.blits(sequence, doreturn=False)
+        return rect
+
+def tile_shade(value: int) -> Tuple[int, int, int]:
+    """Fill color of a cell too small for its digit, darkest for MIN_TILE"""
+    t = (value - MIN_TILE + 1) / (MAX_TILE - MIN_TILE + 1)
+    return tuple(int(a + (b - a) * t) for a, b in zip(Colors.DARK_CELL, Colors.NEON_BLUE))
+
+class SpriteAtlas:
+    """Every look of a grid cell and a preview tile, drawn once into one surface
+
+    Cells come in three borders (normal, hover, highlight) for each value
+    (0 = empty); preview tiles in two colors (current, queued) for each
+    value. Both are drawn to the screen as areas of this one surface, so the
+    grid and the preview panel take a single Surface.blits call. There is
+    one atlas per zoom level; only the full-size one holds the tiles.
+    """
+    CELL_BORDERS = (Colors.NEON_PURPLE, Colors.NEON_BLUE, Colors.GOLD)
+    TILE_COLORS = (Colors.GOLD, Colors.DARK_PURPLE)
+    TILE_SIZE = (200, 45)
+    
+    def __init__(self, text_cache: TextCache, cell_size: int, tiles: bool = True):
+        self.text_cache = text_cache
+        self.cell_size = cell_size
+        self.tiles = tiles
+        self.rects: Dict[tuple, pygame.Rect] = {}
+        
+        for border in range(len(self.CELL_BORDERS)):
+            for value in range(MAX_TILE + 1):
+                self.rects[('cell', value, border)] = pygame.Rect(
+                    value * cell_size, border * cell_size, cell_size, cell_size)
+        if not tiles:
+            return
+        tile_w, tile_h = self.TILE_SIZE
+        top = len(self.CELL_BORDERS) * cell_size
+        for shade in range(len(self.TILE_COLORS)):
+            for value in range(MIN_TILE, MAX_TILE + 1):
+                self.rects[('tile', value, shade)] = pygame.Rect(
+                    (value - MIN_TILE) * tile_w, top + shade * tile_h, tile_w, tile_h)
+    
+    @property
+    def surface(self) -> pygame.Surface:
+        return self.text_cache.surfaces.get_or_create(('sprites', self.cell_size, self.tiles),
+                                                      self._build)
+    
+    def _digit(self, value: int) -> pygame.Surface:
+        if self.cell_size == CELL_SIZE:
+            return self.text_cache.get('large', str(value), Colors.WHITE)
+        # Scaled like the 'large' font is to CELL_SIZE; rendered once, into the atlas
+        font = pygame.font.Font(None, max(8, 48 * self.cell_size // CELL_SIZE))
+        return font.render(str(value), True, Colors.WHITE)
+    
+    def _build(self) -> pygame.Surface:
+        bounds = pygame.Rect(0, 0, 0, 0).unionall(list(self.rects.values()))
+        atlas = pygame.Surface(bounds.size).convert()
+        # Tiles sit on the next-tiles panel, so their rounded corners show its color
+        atlas.fill(Colors.DARK_CELL)
+        radius = max(1, self.cell_size // 9)
+        width = max(1, self.cell_size // 45)
+        
+        for (kind, value, style), rect in self.rects.items():
+            sprite = atlas.subsurface(rect)
+            if kind == 'cell':
+                if value and self.cell_size < MIN_DIGIT_CELL:
+                    sprite.fill(tile_shade(value))
+                pygame.draw.rect(sprite, self.CELL_BORDERS[style], sprite.get_rect(), width,
+                                 border_radius=radius)
+                if value and self.cell_size >= MIN_DIGIT_CELL:
+                    text_surf = self._digit(value)
+                    sprite.blit(text_surf, text_surf.get_rect(center=(rect.width // 2, rect.height // 2)))
+            else:
+                pygame.draw.rect(sprite, self.TILE_COLORS[style], sprite.get_rect(), border_radius=10)
+                pygame.draw.rect(sprite, Colors.NEON_BLUE, sprite.get_rect(), 2, border_radius=10)
+                text_surf = self.text_cache.get('large', str(value), Colors.WHITE)
+                sprite.blit(text_surf, text_surf.get_rect(center=(rect.width // 2, 22)))
+        return atlas
+
+class Viewport:
+    """The part of the board shown in the grid area, at one of ZOOM_LEVELS
+
+    Cell positions, hit testing and culling are arithmetic on the cell
+    pitch, so they cost the same on a 101x101 board as on 7x7. A board
+    smaller than the view is centered in it; a larger one scrolls.
+    """
+    def __init__(self, rect: pygame.Rect, board_size: int):
+        self.rect = rect
+        self.board_size = board_size
+        self.scroll_x = 0
+        self.scroll_y = 0
+        # The largest cells that fit the whole board, else the smallest
+        fits = [i for i, cell in enumerate(ZOOM_LEVELS)
+                if board_size * (cell + self.padding_of(cell)) <= min(rect.size)]
+        self.zoom = fits[0] if fits else len(ZOOM_LEVELS) - 1
+    
+    @staticmethod
+    def padding_of(cell_size: int) -> int:
+        return max(1, cell_size * GRID_PADDING // CELL_SIZE)
+    
+    @property
+    def cell_size(self) -> int:
+        return ZOOM_LEVELS[self.zoom]
+    
+    @property
+    def pitch(self) -> int:
+        return self.cell_size + self.padding_of(self.cell_size)
+    
+    def origin(self) -> Tuple[int, int]:
+        """Screen position of cell (0, 0)"""
+        content = self.board_size * self.pitch
+        return (self.rect.x + max(0, (self.rect.width - content) // 2) - self.scroll_x,
+                self.rect.y + max(0, (self.rect.height - content) // 2) - self.scroll_y)
+    
+    def cell_rect(self, row: int, col: int) -> pygame.Rect:
+        """Where the cell is drawn, cut to the view; empty if it is scrolled out"""
+        x, y = self.origin()
+        pitch = self.pitch
+        return pygame.Rect(x + col * pitch, y + row * pitch,
+                           self.cell_size, self.cell_size).clip(self.rect)
+    
+    def cell_at(self, pos: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """(row, col) of the cell under pos, or None over padding or outside the board"""
+        if not self.rect.collidepoint(pos):
+            return None
+        x, y = self.origin()
+        col, dx = divmod(pos[0] - x, self.pitch)
+        row, dy = divmod(pos[1] - y, self.pitch)
+        if dx >= self.cell_size or dy >= self.cell_size:
+            return None
+        if not (0 <= row < self.board_size and 0 <= col < self.board_size):
+            return None
+        return row, col
+    
+    def visible(self, clip: pygame.Rect) -> Tuple[range, range]:
+        """Rows and columns with a pixel inside both the view and clip"""
+        area = clip.clip(self.rect)
+        if not area.width or not area.height:
+            return range(0), range(0)
+        x, y = self.origin()
+        pitch = self.pitch
+        last = self.board_size - 1
+        return (range(max(0, (area.top - y) // pitch), min(last, (area.bottom - 1 - y) // pitch) + 1),
+                range(max(0, (area.left - x) // pitch), min(last, (area.right - 1 - x) // pitch) + 1))
+    
+    def _clamp(self):
+        overflow = max(0, self.board_size * self.pitch - self.rect.width)
+        self.scroll_x = max(0, min(self.scroll_x, overflow))
+        overflow = max(0, self.board_size * self.pitch - self.rect.height)
+        self.scroll_y = max(0, min(self.scroll_y, overflow))
+    
+    @property
+    def movable(self) -> bool:
+        """Only large boards zoom and scroll; 7x7 keeps its fixed layout"""
+        return self.board_size >= LARGE_BOARD_MIN
+    
+    def scroll_by(self, dx: int, dy: int) -> bool:
+        """Move the view over the board; True if it moved"""
+        before = (self.scroll_x, self.scroll_y)
+        self.scroll_x += dx
+        self.scroll_y += dy
+        self._clamp()
+        return (self.scroll_x, self.scroll_y) != before
+    
+    def zoom_at(self, steps: int, pos: Tuple[int, int]) -> bool:
+        """Zoom in (steps > 0) or out, keeping the board point under pos in place"""
+        zoom = max(0, min(len(ZOOM_LEVELS) - 1, self.zoom - steps))
+        if zoom == self.zoom:
+            return False
+        x, y = self.origin()
+        u = (pos[0] - x) / self.pitch
+        v = (pos[1] - y) / self.pitch
+        self.zoom = zoom
+        self.scroll_x = self.scroll_y = 0
+        x, y = self.origin()
+        self.scroll_x = round(x + u * self.pitch - pos[0])
+        self.scroll_y = round(y + v * self.pitch - pos[1])
+        self._clamp()
+        return True
 
 class Cell:
-    # Static cache for all cell surfaces
-    _cell_cache = {}
+    """Rendering view of one board cell; the value lives in the engine's Board"""
+    __slots__ = ('row', 'col', 'view', 'hover', 'highlight', 'highlight_time', 'board')
     
-    def __init__(self, row: int, col: int, x: int, y: int, size: int, text_cache: TextCache):
+    def __init__(self, row: int, col: int, view: Viewport, board: Board):
         self.row = row
         self.col = col
-        self.x = x
-        self.y = y
-        self.size = size
-        self.value: Optional[int] = None
+        self.view = view
         self.hover = False
         self.highlight = False
         self.highlight_time = 0.0
-        self.text_cache = text_cache
+        self.board = board
+    
+    @property
+    def value(self) -> Optional[int]:
+        return self.board.get(self.row, self.col)
     
     def reset(self):
-        self.value = None
         self.hover = False
         self.highlight = False
         self.highlight_time = 0.0
     
-    def update(self, dt: float):
+    @property
+    def rect(self) -> pygame.Rect:
+        return self.view.cell_rect(self.row, self.col)
+    
+    def update(self, dt: float) -> bool:
+        """Advance the highlight; True if the cell's look changed"""
         if self.highlight:
             self.highlight_time += dt
-            if self.highlight_time > 1.0:
+            if self.highlight_time > HIGHLIGHT_TIME:
                 self.highlight = False
                 self.highlight_time = 0.0
+                return True
+        return False
     
-    def draw(self, surface: pygame.Surface):
-        # Cache key
-        cache_key = (self.size, self.value, self.hover, self.highlight)
-        
-        if cache_key not in Cell._cell_cache:
-            # Create cell surface
-            cell_surf = pygame.Surface((self.size, self.size))
-            cell_surf.fill(Colors.DARK_CELL)
-            
-            # Border
-            border_color = Colors.NEON_BLUE if self.hover else Colors.NEON_PURPLE
-            if self.highlight:
-                border_color = Colors.GOLD
-            pygame.draw.rect(cell_surf, border_color, cell_surf.get_rect(), 2, border_radius=10)
-            
-            # Value
-            if self.value is not None:
-                text_surf = self.text_cache.get('large', str(self.value), Colors.WHITE)
-                text_rect = text_surf.get_rect(center=(self.size // 2, self.size // 2))
-                cell_surf.blit(text_surf, text_rect)
-            
-            Cell._cell_cache[cache_key] = cell_surf
-        
-        surface.blit(Cell._cell_cache[cache_key], (self.x, self.y))
+    @property
+    def sprite_key(self) -> tuple:
+        """Which SpriteAtlas cell this cell looks like right now"""
+        border = 2 if self.highlight else 1 if self.hover else 0
+        return ('cell', self.value or 0, border)
     
     def is_empty(self) -> bool:
-        return self.value is None
+        return self.board.is_empty(self.row, self.col)
 
 class Button:
     def __init__(self, x: int, y: int, width: int, height: int, text: str, 
@@ -247,67 +718,318 @@ class Button:
         self.hover = False
         self.text_cache = text_cache
         self.font_name = font_name
-        self._cached_normal = None
-        self._cached_hover = None
-        self._create_cache()
-    
-    def _create_cache(self):
-        # Normal state
-        self._cached_normal = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-        pygame.draw.rect(self._cached_normal, self.color, self._cached_normal.get_rect(), border_radius=10)
-        pygame.draw.rect(self._cached_normal, Colors.WHITE, self._cached_normal.get_rect(), 2, border_radius=10)
+    
+    def _render(self, hover: bool) -> pygame.Surface:
+        """Rendered on first draw, so unused screens cost nothing at startup"""
+        color = tuple(min(255, int(c * 1.3)) for c in self.color) if hover else self.color
+        surf = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.rect(surf, color, surf.get_rect(), border_radius=10)
+        pygame.draw.rect(surf, Colors.WHITE, surf.get_rect(), 2, border_radius=10)
         text_surf = self.text_cache.get(self.font_name, self.text, Colors.WHITE)
         text_rect = text_surf.get_rect(center=(self.rect.width // 2, self.rect.height // 2))
-        self._cached_normal.blit(text_surf, text_rect)
-        
-        # Hover state
-        hover_color = tuple(min(255, int(c * 1.3)) for c in self.color)
-        self._cached_hover = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-        pygame.draw.rect(self._cached_hover, hover_color, self._cached_hover.get_rect(), border_radius=10)
-        pygame.draw.rect(self._cached_hover, Colors.WHITE, self._cached_hover.get_rect(), 2, border_radius=10)
-        self._cached_hover.blit(text_surf, text_rect)
+        surf.blit(text_surf, text_rect)
+        return surf
     
-    def update(self, mouse_pos: Tuple[int, int]):
-        self.hover = self.rect.collidepoint(mouse_pos)
+    def update(self, mouse_pos: Tuple[int, int]) -> bool:
+        """Track hover; True if it changed"""
+        hover = bool(self.rect.collidepoint(mouse_pos))
+        changed = hover != self.hover
+        self.hover = hover
+        return changed
     
     def draw(self, surface: pygame.Surface):
-        surf = self._cached_hover if self.hover else self._cached_normal
+        # Buttons that look alike share a cache entry
+        key = ('button', self.text, self.color, self.font_name, self.rect.size, self.hover)
+        surf = self.text_cache.surfaces.get_or_create(key, lambda: self._render(self.hover))
         surface.blit(surf, self.rect.topleft)
     
     def is_clicked(self, mouse_pos: Tuple[int, int]) -> bool:
         return self.rect.collidepoint(mouse_pos)
 
+def merge_rects(rects: List[pygame.Rect]) -> List[pygame.Rect]:
+    """Union overlapping rectangles so no pixel is redrawn twice"""
+    merged: List[pygame.Rect] = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = 0
+        while i < len(merged):
+            if rect.colliderect(merged[i]):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
+
+class StartupProfile:
+    """Wall-clock time of each startup phase (--startup-profile)"""
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.reported = False
+    
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases.append((name, elapsed))
+            if self.enabled and self.reported:
+                # Deferred work done after the first frame
+                print(f"  [startup] {name:<28} {elapsed * 1000:8.1f} ms (deferred)")
+    
+    def report(self):
+        self.reported = True
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self.start
+        print("Startup profile:")
+        for name, elapsed in self.phases:
+            print(f"  {name:<38} {elapsed * 1000:8.1f} ms")
+        print(f"  {'total to first frame':<38} {total * 1000:8.1f} ms\n")
+
+class FrameProfiler:
+    """Per-phase frame times in a fixed-size ring buffer (F overlay, --frame-csv)
+
+    A frame is split into events, update, draw (rendering) and present
+    (display.flip/update). Time spent waiting for the next frame is not counted.
+    """
+    PHASES = ('events', 'update', 'draw', 'present')
+    
+    def __init__(self, size: int = FRAME_HISTORY, csv_path: Optional[str] = None):
+        self.size = size
+        self.times = {name: array('d', bytes(8 * size)) for name in self.PHASES + ('frame',)}
+        self.starts = array('d', bytes(8 * size))
+        self.count = 0  # frames recorded; the newest is at (count - 1) % size
+        self.current = dict.fromkeys(self.PHASES, 0.0)
+        self.frame_start = self.mark = self.epoch = time.perf_counter()
+        
+        self.csv_file = None
+        if csv_path:
+            self.csv_file = open(csv_path, 'w', newline='')
+            self.csv = csv.writer(self.csv_file)
+            self.csv.writerow(['frame', 'time_s'] + [f'{name}_ms' for name in self.PHASES]
+                              + ['frame_ms'])
+    
+    def start_frame(self):
+        self.frame_start = self.mark = time.perf_counter()
+        for name in self.PHASES:
+            self.current[name] = 0.0
+    
+    def lap(self, phase: str):
+        """Charge the time since the previous lap to phase"""
+        now = time.perf_counter()
+        self.current[phase] += now - self.mark
+        self.mark = now
+    
+    def end_frame(self):
+        i = self.count % self.size
+        total = 0.0
+        for name in self.PHASES:
+            self.times[name][i] = self.current[name]
+            total += self.current[name]
+        self.times['frame'][i] = total
+        self.starts[i] = self.frame_start
+        self.count += 1
+        if self.csv_file:
+            self.csv.writerow([self.count, f'{self.frame_start - self.epoch:.6f}']
+                              + [f'{self.current[name] * 1000:.3f}' for name in self.PHASES]
+                              + [f'{total * 1000:.3f}'])
+    
+    def samples(self, name: str) -> array:
+        return self.times[name][:min(self.count, self.size)]
+    
+    def percentiles(self, name: str, qs: Tuple[float, ...] = (0.50, 0.95, 0.99)) -> List[float]:
+        """Seconds at each quantile of a phase (or 'frame') over the buffer"""
+        values = sorted(self.samples(name))
+        if not values:
+            return [0.0] * len(qs)
+        return [values[min(len(values) - 1, int(q * len(values)))] for q in qs]
+    
+    def histogram(self, bins: int, limit: float) -> List[int]:
+        """Frame time counts in equal bins up to limit seconds; the last bin takes the rest"""
+        counts = [0] * bins
+        width = limit / bins
+        for t in self.samples('frame'):
+            counts[min(bins - 1, int(t / width))] += 1
+        return counts
+    
+    def fps(self, window: int = 60) -> float:
+        """Frame rate over the last `window` frame starts"""
+        n = min(self.count, self.size, window)
+        if n < 2:
+            return 0.0
+        newest = self.starts[(self.count - 1) % self.size]
+        oldest = self.starts[(self.count - n) % self.size]
+        return (n - 1) / (newest - oldest) if newest > oldest else 0.0
+    
+    def close(self):
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = None
+
+class StateCapture:
+    """cProfile and tracemalloc captures tagged with the game state (F9, --capture)
+
+    A capture covers one stretch of one state; a state change while
+    capturing writes the finished capture and starts the next. Each capture
+    is a .prof file (pstats, snakeviz) and an .alloc.txt of the sites whose
+    allocations grew most, written next to the save file.
+    """
+    def __init__(self, top: int = CAPTURE_TOP):
+        self.top = top
+        self.profiler: Optional[cProfile.Profile] = None
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.state = GameState.MENU
+        self.started = 0.0
+        self.sequence = 0
+    
+    @property
+    def active(self) -> bool:
+        return self.profiler is not None
+    
+    def start(self, state: int):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.state = state
+        self.started = time.time()
+        self.snapshot = self._take_snapshot()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+    
+    def stop(self, keep_tracing: bool = False) -> Optional[Path]:
+        """Finish the capture and write it; returns the .prof path"""
+        if self.profiler is None:
+            return None
+        self.profiler.disable()
+        growth = self._take_snapshot().compare_to(self.snapshot, 'lineno')
+        profiler, self.profiler, self.snapshot = self.profiler, None, None
+        if not keep_tracing:
+            tracemalloc.stop()
+        
+        self.sequence += 1
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))
+        stem = f"quantumgrid_profile_{STATE_NAMES[self.state].lower()}_{stamp}_{self.sequence}"
+        prof_path = SAVE_FILE.with_name(stem + '.prof')
+        alloc_path = SAVE_FILE.with_name(stem + '.alloc.txt')
+        try:
+            profiler.dump_stats(str(prof_path))
+            with open(alloc_path, 'w') as f:
+                f.write(f"{STATE_NAMES[self.state]}: {time.time() - self.started:.1f}s from {stamp}\n")
+                f.write(f"Top {self.top} allocation sites by growth:\n")
+                for stat in growth[:self.top]:
+                    f.write(f"{stat}\n")
+        except OSError as e:
+            print(f"Could not write capture {stem}: {e}")
+            return None
+        return prof_path
+    
+    def rotate(self, state: int) -> Optional[Path]:
+        """Close the capture for the previous state and start one for state"""
+        path = self.stop(keep_tracing=True)
+        self.start(state)
+        return path
+    
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        # The profiler's and tracemalloc's own bookkeeping is not the game's
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+        ))
+
+# Window events that stop and restart rendering
+SUSPEND_EVENTS = (pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN, pygame.WINDOWFOCUSLOST)
+RESUME_EVENTS = (pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWFOCUSGAINED,
+                 pygame.WINDOWEXPOSED)
+
+# Viewport controls: key -> scroll direction (dx, dy), key -> zoom steps
+SCROLL_KEYS = {pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0),
+               pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1)}
+ZOOM_KEYS = {pygame.K_PLUS: 1, pygame.K_EQUALS: 1, pygame.K_KP_PLUS: 1,
+             pygame.K_MINUS: -1, pygame.K_KP_MINUS: -1}
+
+STATE_NAMES = {value: name for name, value in vars(GameState).items() if name.isupper()}
+
+# Text group each screen needs; loaded when the screen is first drawn
+STATE_TEXT_GROUPS = {
+    GameState.MENU: 'menu',
+    GameState.PLAYING: 'game',
+    GameState.PAUSED: 'game',
+    GameState.GAME_OVER: 'game',
+    GameState.TUTORIAL: 'tutorial',
+}
+
 class QuantumGridGame:
-    def __init__(self):
+    def __init__(self, startup_profile: bool = False, cache_budget_mb: int = CACHE_BUDGET_MB,
+                 frame_csv: Optional[str] = None, capture: bool = False,
+                 player: str = 'player', board_size: int = GRID_SIZE):
         print("Initializing QuantumGrid ULTRA-FAST...")
-        
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption(f"QuantumGrid v{VERSION}")
+        self.profile = StartupProfile(startup_profile)
+        self.frames = FrameProfiler(csv_path=frame_csv)
+        self.capture = StateCapture()
+        self.capture_at_start = capture
+        self.surfaces = SurfaceCache(cache_budget_mb * 1024 * 1024)
+        
+        # Only the subsystems the game uses; no audio or joystick
+        with self.profile.phase('display init'):
+            pygame.display.init()
+        with self.profile.phase('font init'):
+            pygame.font.init()
+        with self.profile.phase('window'):
+            self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+            pygame.display.set_caption(f"QuantumGrid v{VERSION}")
         
         self.clock = pygame.time.Clock()
         self.running = True
         self.state = GameState.MENU
         self.needs_redraw = True
         
-        # Text cache - THIS IS THE KEY!
-        self.text_cache = TextCache()
+        # Text cache - THIS IS THE KEY! Menu text now, the rest on demand
+        with self.profile.phase("text 'menu'"):
+            self.text_cache = TextCache(self.surfaces)
+        self.numbers = NumberRenderer(self.text_cache)
+        self.sprites = SpriteAtlas(self.text_cache, CELL_SIZE)
+        self.zoom_sprites: Dict[int, SpriteAtlas] = {}  # cell size -> cells-only atlas
         
-        # Game state
-        self.score = 0
-        self.level = 1
-        self.moves_remaining = 25
-        self.quantum_energy = 3
+        # Game state - rules live in the engine; saves are written in the background
+        self.engine = GameEngine(size=board_size)
+        self.saver = SaveWriter()
         self.high_score = self.load_high_score()
-        self.combo_count = 0
+        self.player = player
+        self.game_started = time.monotonic()
+        with self.profile.phase('history'):
+            self.history: Optional[GameHistory] = None
+            self.leaderboard = []
+            try:
+                self.history = GameHistory(HISTORY_FILE)
+                self.leaderboard = self.history.top(LEADERBOARD_SIZE)
+            except sqlite3.Error as e:
+                print(f"Game history unavailable ({HISTORY_FILE}): {e}")
         self.last_score_gain = 0
         self.last_score_time = 0.0
-        self.game_over_reason = ""
         
         # Grid
         self.cells: List[List[Cell]] = []
-        self.next_tiles: List[int] = []
         self.grid_offset_x = 50
         self.grid_offset_y = 150
+        self.viewport = Viewport(pygame.Rect(self.grid_offset_x, self.grid_offset_y,
+                                             GRID_VIEW, GRID_VIEW), board_size)
+        self.hover_cell: Optional[Cell] = None
+        # Board image cache key -> cells changed since that image was drawn
+        self.stale_cells: Dict[tuple, Set[Tuple[int, int]]] = {}
+        
+        # Panels right of the grid; fixed so they can be invalidated
+        panel_x = self.viewport.rect.right + 40
+        self.score_panel_rect = pygame.Rect(panel_x, self.grid_offset_y, 300, 400)
+        self.next_panel_rect = pygame.Rect(panel_x, self.grid_offset_y + 440, 300, 250)
+        
+        # Regions to repaint on the next draw; needs_redraw repaints everything
+        self.dirty: List[pygame.Rect] = []
+        self.screen_rect = self.screen.get_rect()
         
         # UI
         self.buttons: Dict[str, Button] = {}
@@ -315,20 +1037,57 @@ class QuantumGridGame:
         self.max_tutorial_pages = 3
         self.last_click_time = 0
         self.show_fps = False
-        self.fps_history = []
+        self.overlay_rect = pygame.Rect(WINDOW_WIDTH - 310, 6, 304, 176)  # clear of the grid and panels
+        self.overlay_age = 0.0
+        self.highlighted: List[Cell] = []  # cells whose highlight is still timing out
+        self.suspended = False  # minimized or unfocused: don't render
         
         # Cached surfaces
         print("  Creating background...")
-        self._background_cache = self._create_background()
-        self._tutorial_cache = {}
+        with self.profile.phase('background'):
+            self._background_cache = self.surfaces.put(('background',),
+                                                       self._create_background().convert(), pin=True)
+        self._layer_keys: Dict[str, tuple] = {}
         
         print("  Setting up game...")
-        self.setup_buttons()
-        self.setup_grid()
-        self.generate_next_tiles()
+        with self.profile.phase('buttons and grid'):
+            self.setup_buttons()
+            self.setup_grid()
+        with self.profile.phase('resume'):
+            self.resume_snapshot()
+        self.closed = False
         
         print("Ready!\n")
     
+    # Read-only views of the engine state used by the drawing code
+    @property
+    def score(self) -> int:
+        return self.engine.score
+    
+    @property
+    def level(self) -> int:
+        return self.engine.level
+    
+    @property
+    def moves_remaining(self) -> int:
+        return self.engine.moves_remaining
+    
+    @property
+    def quantum_energy(self) -> int:
+        return self.engine.quantum_energy
+    
+    @property
+    def next_tiles(self) -> List[int]:
+        return self.engine.next_tiles
+    
+    @property
+    def combo_count(self) -> int:
+        return self.engine.combo_count
+    
+    @property
+    def game_over_reason(self) -> str:
+        return self.engine.game_over_reason
+    
     def _create_background(self) -> pygame.Surface:
         bg = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
         
@@ -356,7 +1115,7 @@ class QuantumGridGame:
         self.buttons['quit'] = Button(WINDOW_WIDTH//2 - 150, menu_y + 160, 300, 60,
                                       "QUIT", Colors.NEON_PINK, self.text_cache)
         
-        panel_x = self.grid_offset_x + GRID_SIZE * (CELL_SIZE + GRID_PADDING) + 40
+        panel_x = self.viewport.rect.right + 40
         panel_y = self.grid_offset_y + 710
         
         self.buttons['new_game'] = Button(panel_x + 10, panel_y, 280, 45,
@@ -387,34 +1146,24 @@ class QuantumGridGame:
                                                 "START PLAYING", Colors.NEON_GREEN, self.text_cache, 'small')
     
     def setup_grid(self):
-        self.cells = []
-        for row in range(GRID_SIZE):
-            cell_row = []
-            for col in range(GRID_SIZE):
-                x = self.grid_offset_x + col * (CELL_SIZE + GRID_PADDING)
-                y = self.grid_offset_y + row * (CELL_SIZE + GRID_PADDING)
-                cell = Cell(row, col, x, y, CELL_SIZE, self.text_cache)
-                cell_row.append(cell)
-            self.cells.append(cell_row)
-    
-    def generate_next_tiles(self):
-        self.next_tiles = [random.randint(1, 9) for _ in range(3)]
+        size = self.engine.board.size
+        self.cells = [[Cell(row, col, self.viewport, self.engine.board) for col in range(size)]
+                      for row in range(size)]
     
     def reset_game(self):
-        self.score = 0
-        self.level = 1
-        self.moves_remaining = 25
-        self.quantum_energy = 3
-        self.combo_count = 0
+        self.engine.reset()
+        self.game_started = time.monotonic()
+        self.saver.remove(SNAPSHOT_FILE)  # the previous game is abandoned
         self.last_score_gain = 0
         self.last_score_time = 0.0
-        self.game_over_reason = ""
         
         for row in self.cells:
             for cell in row:
                 cell.reset()
+        self.highlighted.clear()
+        self.hover_cell = None
+        self.drop_board_images()
         
-        self.generate_next_tiles()
         self.state = GameState.PLAYING
         self.needs_redraw = True
     
@@ -424,50 +1173,198 @@ class QuantumGridGame:
                 with open(SAVE_FILE, 'r') as f:
                     data = json.load(f)
                     return data.get('high_score', 0)
-        except:
-            pass
+        except (OSError, ValueError) as e:
+            print(f"Could not read {SAVE_FILE}: {e}")
         return 0
     
     def save_high_score(self):
+        """Queue a save; the writer coalesces bursts and writes off the UI thread"""
+        data = json.dumps({'high_score': self.high_score, 'version': VERSION})
+        self.saver.write(SAVE_FILE, data.encode())
+    
+    def save_snapshot(self):
+        """Queue the game in progress for resuming; bytes, not JSON, and off the UI thread"""
+        played = time.monotonic() - self.game_started
+        self.saver.write(SNAPSHOT_FILE, snapshot.encode(self.engine, played))
+    
+    def resume_snapshot(self):
+        """Continue, paused, the game that was in progress when the last session ended"""
+        if not SNAPSHOT_FILE.exists():
+            return
         try:
-            with open(SAVE_FILE, 'w') as f:
-                json.dump({'high_score': self.high_score, 'version': VERSION}, f)
-        except:
-            pass
+            played = snapshot.restore(SNAPSHOT_FILE.read_bytes(), self.engine)
+        except (OSError, snapshot.SnapshotError) as e:
+            print(f"Could not resume the saved game: {e}")
+            self.engine.reset()
+            return
+        if self.engine.is_over:
+            self.engine.reset()
+            return
+        self.game_started = time.monotonic() - played
+        self.state = GameState.PAUSED
+        print(f"  Resumed game: score {self.score:,}, level {self.level}")
     
-    def is_board_full(self) -> bool:
-        """Check if the board has no empty cells"""
-        for row in self.cells:
-            for cell in row:
-                if cell.is_empty():
-                    return False
-        return True
+    def game_in_progress(self) -> bool:
+        return self.engine.moves_used > 0 and not self.engine.is_over
     
     def update(self, dt: float):
-        dt = min(dt, 0.1)
-        
-        self.fps_history.append(self.clock.get_fps())
-        if len(self.fps_history) > 60:
-            self.fps_history.pop(0)
-        
-        if self.state == GameState.PLAYING:
-            for row in self.cells:
-                for cell in row:
-                    cell.update(dt)
+        if self.state == GameState.PLAYING and self.highlighted:
+            expired = [cell for cell in self.highlighted if cell.update(dt)]
+            if expired:
+                self.highlighted = [cell for cell in self.highlighted if cell.highlight]
+                self.cells_changed(expired)
         
         if self.last_score_gain > 0:
+            shown = self.popup_rects()  # before the timer passes and hides them
             self.last_score_time += dt
-            if self.last_score_time > 2.0:
+            if self.last_score_time > POPUP_TIME:
                 self.last_score_gain = 0
                 self.last_score_time = 0.0
-                self.needs_redraw = True
+                self.invalidate(*shown, *self.popup_rects())
+        
+        if self.show_fps:
+            self.overlay_age += dt
+            if self.overlay_age >= OVERLAY_REFRESH:
+                self.overlay_age = 0.0
+                self.invalidate(self.overlay_rect)
+    
+    def next_wakeup(self) -> Optional[float]:
+        """Seconds until update() has something to change, or None if nothing is pending"""
+        pending = []
+        if self.state == GameState.PLAYING:
+            pending.extend(HIGHLIGHT_TIME - cell.highlight_time for cell in self.highlighted)
+        if self.last_score_gain > 0:
+            pending.append(POPUP_TIME - self.last_score_time)
+        return max(0.0, min(pending)) if pending else None
+    
+    def wait_for_event(self) -> Optional[pygame.event.Event]:
+        """Block until input arrives or the next timer is due; None on timeout"""
+        wakeup = self.next_wakeup()
+        if wakeup is None:
+            event = pygame.event.wait()
+        else:
+            # Round up so the timer has expired when update() runs
+            event = pygame.event.wait(max(1, math.ceil(wakeup * 1000) + 1))
+        return None if event.type == pygame.NOEVENT else event
+    
+    def require_text(self, group: str):
+        if group not in self.text_cache.loaded:
+            with self.profile.phase(f"text '{group}'"):
+                self.text_cache.require(group)
+    
+    def invalidate(self, *rects: pygame.Rect):
+        """Queue screen regions to be repainted on the next draw"""
+        self.dirty.extend(rects)
+    
+    def visible_buttons(self) -> List[str]:
+        if self.state == GameState.MENU:
+            return ['play', 'tutorial', 'quit']
+        if self.state == GameState.PLAYING:
+            return ['new_game', 'pause', 'help']
+        if self.state == GameState.PAUSED:
+            return ['resume', 'restart', 'menu']
+        if self.state == GameState.GAME_OVER:
+            return ['play_again', 'menu_go']
+        names = ['tutorial_prev'] if self.tutorial_page > 0 else []
+        if self.tutorial_page < self.max_tutorial_pages - 1:
+            names.append('tutorial_next')
+        else:
+            names.append('tutorial_close')
+        return names
+    
+    def update_hover(self, mouse_pos: Tuple[int, int]):
+        for button_name in self.visible_buttons():
+            button = self.buttons[button_name]
+            if button.update(mouse_pos):
+                self.invalidate(button.rect)
+    
+    def update_cell_hover(self, mouse_pos: Tuple[int, int]):
+        """Move the hover border to the empty cell under the mouse, if any"""
+        hit = self.viewport.cell_at(mouse_pos)
+        cell = self.cells[hit[0]][hit[1]] if hit else None
+        if cell is not None and not cell.is_empty():
+            cell = None
+        if cell is self.hover_cell:
+            return
+        for changed in (self.hover_cell, cell):
+            if changed is not None:
+                changed.hover = changed is cell
+                self.cell_changed(changed)
+        self.hover_cell = cell
+    
+    def cell_changed(self, cell: Cell):
+        """Repaint a cell whose value, hover or highlight changed"""
+        self.invalidate(cell.rect)
+        for stale in self.stale_cells.values():
+            stale.add((cell.row, cell.col))
+    
+    def cells_changed(self, cells: List[Cell]):
+        """cell_changed for many cells; only those in the view are repainted"""
+        for stale in self.stale_cells.values():
+            stale.update((cell.row, cell.col) for cell in cells)
+        rows, cols = self.viewport.visible(self.viewport.rect)
+        shown = [cell for cell in cells if cell.row in rows and cell.col in cols]
+        if len(shown) > CELL_RECTS_MAX:
+            self.invalidate(self.viewport.rect)
+        else:
+            self.invalidate(*(cell.rect for cell in shown))
+    
+    def drop_board_images(self):
+        """Forget every board image, after most of the board changed at once"""
+        for key in self.stale_cells:
+            self.surfaces.discard(key)
+        self.stale_cells.clear()
+    
+    def view_changed(self):
+        """The viewport scrolled or zoomed: repaint the grid area"""
+        self.invalidate(self.viewport.rect)
+        self.update_cell_hover(pygame.mouse.get_pos())
+    
+    def grid_atlas(self) -> SpriteAtlas:
+        """Cell sprites at the current zoom; each zoom's atlas is built once and cached"""
+        cell_size = self.viewport.cell_size
+        if cell_size == self.sprites.cell_size:
+            return self.sprites
+        atlas = self.zoom_sprites.get(cell_size)
+        if atlas is None:
+            atlas = self.zoom_sprites[cell_size] = SpriteAtlas(self.text_cache, cell_size, tiles=False)
+        return atlas
     
     def draw(self):
-        if not self.needs_redraw:
+        """Repaint everything after needs_redraw, otherwise only the dirty regions"""
+        if self.needs_redraw:
+            self.update_hover(pygame.mouse.get_pos())
+            self.require_text(STATE_TEXT_GROUPS[self.state])
+            self.draw_scene()
+            self.frames.lap('draw')
+            pygame.display.flip()
+            self.frames.lap('present')
+            self.needs_redraw = False
+            self.dirty.clear()
             return
         
-        self.screen.blit(self._background_cache, (0, 0))
+        if not self.dirty:
+            return
         
+        rects = [rect.clip(self.screen_rect) for rect in self.dirty]
+        rects = [rect for rect in rects if rect.width and rect.height]
+        self.dirty.clear()
+        if len(rects) > DIRTY_RECTS_MAX:
+            # Each region costs a draw_scene pass, so past a few one larger pass is cheaper
+            rects = [rects[0].unionall(rects[1:])]
+        else:
+            rects = merge_rects(rects)
+        for rect in rects:
+            # Everything is redrawn, but clipped: only this region's pixels change
+            self.screen.set_clip(rect)
+            self.draw_scene()
+        self.screen.set_clip(None)
+        self.frames.lap('draw')
+        pygame.display.update(rects)
+        self.frames.lap('present')
+    
+    def draw_scene(self):
+        # Every state's base layer includes the background
         if self.state == GameState.MENU:
             self.draw_menu()
         elif self.state == GameState.PLAYING:
@@ -481,175 +1378,346 @@ class QuantumGridGame:
         elif self.state == GameState.TUTORIAL:
             self.draw_tutorial()
         
-        if self.show_fps and self.fps_history:
-            avg_fps = sum(self.fps_history) / len(self.fps_history)
-            fps_surf = self.text_cache.get('tiny', f"FPS: {avg_fps:.0f}", Colors.NEON_GREEN)
-            self.screen.blit(fps_surf, (10, 10))
+        if self.show_fps:
+            self.draw_frame_overlay()
         
         version_surf = self.text_cache.get('tiny', f'v{VERSION}', Colors.DARK_PURPLE)
         self.screen.blit(version_surf, (WINDOW_WIDTH - 60, WINDOW_HEIGHT - 25))
-        
-        pygame.display.flip()
-        self.needs_redraw = False
+    
+    def draw_frame_overlay(self):
+        """FPS, p50/p95/p99 per phase and a frame time histogram"""
+        rect = self.overlay_rect
+        pygame.draw.rect(self.screen, Colors.DEEP_SPACE, rect, border_radius=8)
+        pygame.draw.rect(self.screen, Colors.NEON_GREEN, rect, 1, border_radius=8)
+        
+        x, y = rect.x + 8, rect.y + 6
+        columns = (rect.x + 150, rect.x + 222, rect.x + 294)  # right edges
+        self.numbers.draw(self.screen, 'tiny', round(self.frames.fps()), Colors.NEON_GREEN,
+                          (x, y), label='FPS: ', anchor='topleft')
+        y += 18
+        self.screen.blit(self.text_cache.get('tiny', 'phase (us)', Colors.GOLD), (x, y))
+        for right, name in zip(columns, ('p50', 'p95', 'p99')):
+            surf = self.text_cache.get('tiny', name, Colors.GOLD)
+            self.screen.blit(surf, surf.get_rect(topright=(right, y)))
+        for name in ('frame',) + FrameProfiler.PHASES:
+            y += 16
+            self.screen.blit(self.text_cache.get('tiny', name, Colors.WHITE), (x, y))
+            for right, seconds in zip(columns, self.frames.percentiles(name)):
+                self.numbers.draw(self.screen, 'tiny', round(seconds * 1e6), Colors.NEON_GREEN,
+                                  (right, y), anchor='topright')
+        
+        # Histogram up to four frame budgets; bars over budget in pink
+        bins = 24
+        budget = 1.0 / FPS
+        counts = self.frames.histogram(bins, 4 * budget)
+        tallest = max(counts) or 1
+        bar_width = (rect.width - 16) // bins
+        base = rect.bottom - 8
+        for i, count in enumerate(counts):
+            if not count:
+                continue
+            height = max(1, round(36 * count / tallest))
+            color = Colors.NEON_PINK if (i + 1) * 4 * budget / bins > budget else Colors.NEON_BLUE
+            pygame.draw.rect(self.screen, color,
+                             (x + i * bar_width, base - height, bar_width - 1, height))
+        pygame.draw.line(self.screen, Colors.NEON_GREEN, (x, base), (rect.right - 8, base))
+    
+    def layer(self, name: str, inputs: tuple, build: Callable[[], pygame.Surface]) -> pygame.Surface:
+        """A pre-baked static layer, rebuilt only when its inputs change"""
+        key = ('layer', name) + inputs
+        previous = self._layer_keys.get(name)
+        if previous is not None and previous != key:
+            self.surfaces.discard(previous)
+        self._layer_keys[name] = key
+        return self.surfaces.get_or_create(key, build)
     
     def draw_menu(self):
+        inputs = (self.high_score, tuple(self.leaderboard))
+        self.screen.blit(self.layer('menu', inputs, self._build_menu_layer), (0, 0))
+        
+        for button_name in ['play', 'tutorial', 'quit']:
+            self.buttons[button_name].draw(self.screen)
+    
+    def _build_menu_layer(self) -> pygame.Surface:
+        surf = self._background_cache.copy()
+        
         title_surf = self.text_cache.get('title', 'QUANTUMGRID', Colors.NEON_BLUE)
         title_rect = title_surf.get_rect(center=(WINDOW_WIDTH // 2, 150))
-        self.screen.blit(title_surf, title_rect)
+        surf.blit(title_surf, title_rect)
         
         subtitle_surf = self.text_cache.get('small', 'Strategic Puzzle Game', Colors.NEON_GREEN)
         subtitle_rect = subtitle_surf.get_rect(center=(WINDOW_WIDTH // 2, 220))
-        self.screen.blit(subtitle_surf, subtitle_rect)
+        surf.blit(subtitle_surf, subtitle_rect)
         
         if self.high_score > 0:
-            hs_surf = self.text_cache.get('medium', f"High Score: {self.high_score:,}", Colors.GOLD)
-            hs_rect = hs_surf.get_rect(center=(WINDOW_WIDTH // 2, 260))
-            self.screen.blit(hs_surf, hs_rect)
+            self.numbers.draw(surf, 'medium', self.high_score, Colors.GOLD,
+                              (WINDOW_WIDTH // 2, 260), label='High Score: ')
         
-        mouse_pos = pygame.mouse.get_pos()
-        for button_name in ['play', 'tutorial', 'quit']:
-            self.buttons[button_name].update(mouse_pos)
-            self.buttons[button_name].draw(self.screen)
+        if self.leaderboard:
+            self._draw_leaderboard(surf, 580)
+        return surf
+    
+    def _draw_leaderboard(self, surf: pygame.Surface, top: int):
+        """Best games from the history: rank, player, score, level and day"""
+        center = WINDOW_WIDTH // 2
+        header = self.text_cache.get('medium', 'TOP SCORES', Colors.NEON_PURPLE)
+        surf.blit(header, header.get_rect(center=(center, top)))
+        
+        for rank, game in enumerate(self.leaderboard, 1):
+            y = top + 10 + rank * 36
+            rank_surf = self.text_cache.get('small', f'{rank}.', Colors.NEON_BLUE)
+            surf.blit(rank_surf, rank_surf.get_rect(midright=(center - 230, y)))
+            name_surf = self.text_cache.get('small', game.player[:16], Colors.WHITE)
+            surf.blit(name_surf, name_surf.get_rect(midleft=(center - 210, y)))
+            self.numbers.draw(surf, 'small', game.score, Colors.GOLD, (center + 110, y),
+                              anchor='midright')
+            self.numbers.draw(surf, 'small', game.level, Colors.NEON_GREEN, (center + 200, y),
+                              label='Lv ', anchor='midright')
+            day_surf = self.text_cache.get('small', game.day, Colors.NEON_BLUE)
+            surf.blit(day_surf, day_surf.get_rect(midleft=(center + 230, y)))
     
     def draw_game(self):
-        title_surf = self.text_cache.get('title', 'QUANTUMGRID', Colors.NEON_BLUE)
-        title_rect = title_surf.get_rect(center=(WINDOW_WIDTH // 2, 50))
-        self.screen.blit(title_surf, title_rect)
-        
-        self.draw_grid()
+        # Title, panel frames, labels and rules; the 'Best' row moves the labels
+        has_best = self.high_score > 0
+        self.screen.blit(self.layer('game', (has_best,), self._build_game_layer), (0, 0))
+        
+        # Grid cells and preview tiles in one batch from the sprite atlases
+        atlas = self.sprites.surface
+        board = self.board_image()
+        if board is None:
+            grid_atlas = self.grid_atlas().surface
+            grid = [(grid_atlas, pos, area) for pos, area in self.grid_sprites()]
+        else:
+            # The part of the board image inside the view and the clip
+            origin = self.viewport.origin()
+            shown = board.get_rect(topleft=origin).clip(self.viewport.rect).clip(self.screen.get_clip())
+            grid = [(board, shown.topleft, shown.move(-origin[0], -origin[1]))]
+        self.screen.blits(grid + [(atlas, pos, area) for pos, area in self.preview_sprites()],
+                          doreturn=False)
         self.draw_score_panel()
-        self.draw_next_tiles_panel()
-        self.draw_rules_panel()
         
-        mouse_pos = pygame.mouse.get_pos()
         for button_name in ['new_game', 'pause', 'help']:
-            self.buttons[button_name].update(mouse_pos)
             self.buttons[button_name].draw(self.screen)
         
-        if self.combo_count > 1 and self.last_score_time < 2.0:
-            combo_surf = self.text_cache.get('large', f"{self.combo_count}x COMBO!", Colors.GOLD)
-            combo_rect = combo_surf.get_rect(center=(WINDOW_WIDTH // 2, self.grid_offset_y - 50))
-            self.screen.blit(combo_surf, combo_rect)
-        
-        if self.last_score_gain > 0 and self.last_score_time < 2.0:
-            score_surf = self.text_cache.get('large', f"+{self.last_score_gain}", Colors.NEON_GREEN)
-            score_rect = score_surf.get_rect(center=(
-                self.grid_offset_x + (GRID_SIZE * (CELL_SIZE + GRID_PADDING)) // 2,
-                self.grid_offset_y + GRID_SIZE * (CELL_SIZE + GRID_PADDING) + 60
-            ))
-            self.screen.blit(score_surf, score_rect)
-    
-    def draw_grid(self):
-        grid_rect = pygame.Rect(
-            self.grid_offset_x - 20,
-            self.grid_offset_y - 20,
-            GRID_SIZE * (CELL_SIZE + GRID_PADDING) + 20,
-            GRID_SIZE * (CELL_SIZE + GRID_PADDING) + 20
-        )
-        pygame.draw.rect(self.screen, Colors.NEON_BLUE, grid_rect, 2, border_radius=15)
+        if self.combo_count > 1 and self.last_score_time < POPUP_TIME:
+            self.numbers.draw(self.screen, 'large', self.combo_count, Colors.GOLD,
+                              self._combo_center(), suffix='x COMBO!')
         
-        for row in self.cells:
-            for cell in row:
-                cell.draw(self.screen)
+        if self.last_score_gain > 0 and self.last_score_time < POPUP_TIME:
+            self.numbers.draw(self.screen, 'large', self.last_score_gain, Colors.NEON_GREEN,
+                              self._gain_center(), sign=True)
     
-    def draw_score_panel(self):
-        panel_x = self.grid_offset_x + GRID_SIZE * (CELL_SIZE + GRID_PADDING) + 40
-        panel_y = self.grid_offset_y
-        panel_width = 300
+    def _build_game_layer(self) -> pygame.Surface:
+        surf = self._background_cache.copy()
         
-        panel_rect = pygame.Rect(panel_x, panel_y, panel_width, 400)
-        pygame.draw.rect(self.screen, Colors.DARK_CELL, panel_rect, border_radius=15)
-        pygame.draw.rect(self.screen, Colors.NEON_PURPLE, panel_rect, 3, border_radius=15)
+        title_surf = self.text_cache.get('title', 'QUANTUMGRID', Colors.NEON_BLUE)
+        title_rect = title_surf.get_rect(center=(WINDOW_WIDTH // 2, 50))
+        surf.blit(title_surf, title_rect)
         
-        y = panel_y + 20
+        view = self.viewport.rect
+        grid_rect = pygame.Rect(view.x - 20, view.y - 20, view.width + 20, view.height + 20)
+        pygame.draw.rect(surf, Colors.NEON_BLUE, grid_rect, 2, border_radius=15)
+        
+        # Score panel frame and labels
+        panel_rect = self.score_panel_rect
+        rows = self._score_panel_rows()
+        pygame.draw.rect(surf, Colors.DARK_CELL, panel_rect, border_radius=15)
+        pygame.draw.rect(surf, Colors.NEON_PURPLE, panel_rect, 3, border_radius=15)
         
         score_label = self.text_cache.get('medium', 'SCORE', Colors.NEON_YELLOW)
-        score_rect = score_label.get_rect(center=(panel_x + panel_width // 2, y))
-        self.screen.blit(score_label, score_rect)
-        y += 50
+        surf.blit(score_label, score_label.get_rect(center=(panel_rect.centerx, rows['label'])))
         
-        score_surf = self.text_cache.get('large', f"{self.score:,}", Colors.WHITE)
-        score_rect = score_surf.get_rect(center=(panel_x + panel_width // 2, y))
-        self.screen.blit(score_surf, score_rect)
-        y += 80
+        energy_label = self.text_cache.get('tiny', 'QUANTUM ENERGY', Colors.NEON_PURPLE)
+        surf.blit(energy_label, energy_label.get_rect(center=(panel_rect.centerx, rows['energy_label'])))
+        
+        # Next tiles panel frame and title
+        panel_rect = self.next_panel_rect
+        pygame.draw.rect(surf, Colors.DARK_CELL, panel_rect, border_radius=15)
+        pygame.draw.rect(surf, Colors.NEON_BLUE, panel_rect, 3, border_radius=15)
         
+        title_surf = self.text_cache.get('medium', 'NEXT TILES', Colors.NEON_BLUE)
+        title_rect = title_surf.get_rect(center=(panel_rect.centerx, panel_rect.y + 30))
+        surf.blit(title_surf, title_rect)
+        
+        self._draw_rules_panel(surf)
+        return surf
+    
+    def _combo_center(self) -> Tuple[int, int]:
+        return (WINDOW_WIDTH // 2, self.grid_offset_y - 50)
+    
+    def _gain_center(self) -> Tuple[int, int]:
+        return (self.viewport.rect.centerx, self.viewport.rect.bottom + 60)
+    
+    def _score_center(self) -> Tuple[int, int]:
+        return (self.score_panel_rect.centerx, self.score_panel_rect.y + 70)
+    
+    def popup_rects(self) -> List[pygame.Rect]:
+        """Where the combo and +gain popups are currently drawn"""
+        rects = []
+        if self.combo_count > 1 and self.last_score_time < POPUP_TIME:
+            rects.append(self.numbers.get_rect('large', self.combo_count, Colors.GOLD,
+                                               self._combo_center(), suffix='x COMBO!'))
+        if self.last_score_gain > 0 and self.last_score_time < POPUP_TIME:
+            rects.append(self.numbers.get_rect('large', self.last_score_gain, Colors.NEON_GREEN,
+                                               self._gain_center(), sign=True))
+        return rects
+    
+    def score_panel_rects(self) -> List[pygame.Rect]:
+        """The score panel, plus the score itself when it is wider than the panel"""
+        score_rect = self.numbers.get_rect('large', self.score, Colors.WHITE, self._score_center())
+        return [self.score_panel_rect, score_rect]
+    
+    def board_image(self) -> Optional[pygame.Surface]:
+        """The whole board at the current zoom as one surface, or None to draw cells one by one
+
+        Used for boards with so many cells in view that a sprite per cell
+        would cost more than the frame. The image is drawn once per zoom
+        level; after that only the cells changed since are redrawn into it.
+        """
+        view = self.viewport
+        side = view.board_size * view.pitch
+        if view.board_size ** 2 <= BOARD_IMAGE_CELLS or side > BOARD_IMAGE_MAX:
+            return None
+        key = ('board', view.board_size, view.cell_size)
+        
+        def build():
+            image = pygame.Surface((side, side)).convert()
+            image.fill(BOARD_IMAGE_KEY)
+            image.set_colorkey(BOARD_IMAGE_KEY)
+            every = range(view.board_size)
+            image.blits([(atlas, pos, area) for pos, area in self._cell_sprites(every, every, 0, 0)],
+                        doreturn=False)
+            self.stale_cells[key] = set()
+            return image
+        
+        atlas = self.grid_atlas().surface
+        image = self.surfaces.get_or_create(key, build)
+        stale = self.stale_cells[key]
+        if stale:
+            rects = self.grid_atlas().rects
+            image.blits([(atlas, (col * view.pitch, row * view.pitch), rects[self.cells[row][col].sprite_key])
+                         for row, col in stale], doreturn=False)
+            stale.clear()
+        return image
+    
+    def _cell_sprites(self, rows: range, cols: range, origin_x: int,
+                      origin_y: int) -> List[Tuple[Tuple[int, int], pygame.Rect]]:
+        """(position, grid atlas area) of a block of cells, with cell (0, 0) at origin"""
+        pitch = self.viewport.pitch
+        # Most cells look like their value; only hovered and highlighted ones differ
+        rects = self.grid_atlas().rects
+        plain = [rects[('cell', value, 0)] for value in range(MAX_TILE + 1)]
+        values = self.engine.board.values
+        size = self.viewport.board_size
+        xs = [origin_x + col * pitch for col in cols]
+        sprites = []
+        for row in rows:
+            y = origin_y + row * pitch
+            start = row * size
+            sprites.extend(zip([(x, y) for x in xs],
+                               [plain[value] for value in values[start + cols.start:start + cols.stop]]))
+        for cell in self.highlighted + [self.hover_cell]:
+            if cell is not None and cell.row in rows and cell.col in cols:
+                sprites[(cell.row - rows.start) * len(cols) + cell.col - cols.start] = (
+                    (origin_x + cell.col * pitch, origin_y + cell.row * pitch), rects[cell.sprite_key])
+        return sprites
+    
+    def grid_sprites(self) -> List[Tuple[Tuple[int, int], pygame.Rect]]:
+        """(position, grid atlas area) of every cell inside the view and the current clip"""
+        # Cells outside the clip (a dirty region) or scrolled out cannot change any pixel
+        view = self.viewport
+        rows, cols = view.visible(self.screen.get_clip())
+        if not rows or not cols:
+            return []
+        origin_x, origin_y = view.origin()
+        sprites = self._cell_sprites(rows, cols, origin_x, origin_y)
+        
+        # Only cells in the outer rows and columns can be partly scrolled out of
+        # the view; draw just the part inside it
+        width = len(cols)
+        edges = {r * width + c for r in (0, len(rows) - 1) for c in range(width)}
+        edges.update(r * width + c for r in range(len(rows)) for c in (0, width - 1))
+        cell_size = view.cell_size
+        for i in edges:
+            (x, y), area = sprites[i]
+            shown = pygame.Rect(x, y, cell_size, cell_size).clip(view.rect)
+            if shown.size != (cell_size, cell_size):
+                sprites[i] = (shown.topleft, pygame.Rect(area.x + shown.x - x, area.y + shown.y - y,
+                                                         shown.width, shown.height))
+        return sprites
+    
+    def _score_panel_rows(self) -> Dict[str, int]:
+        """Vertical centers of the score panel's rows; the 'Best' row pushes the rest down"""
+        y = self.score_panel_rect.y + 20
+        rows = {'label': y}
+        y += 50
+        rows['score'] = y
+        y += 80
         if self.high_score > 0:
-            hs_surf = self.text_cache.get('tiny', f"Best: {self.high_score:,}", Colors.GOLD)
-            hs_rect = hs_surf.get_rect(center=(panel_x + panel_width // 2, y))
-            self.screen.blit(hs_surf, hs_rect)
+            rows['best'] = y
             y += 40
+        rows['level'] = y
+        y += 60
+        rows['moves'] = y
+        y += 60
+        rows['energy_label'] = y
+        y += 35  # Space between label and orbs
+        rows['orbs'] = y
+        return rows
+    
+    def draw_score_panel(self):
+        center_x = self.score_panel_rect.centerx
+        rows = self._score_panel_rows()
+        
+        self.numbers.draw(self.screen, 'large', self.score, Colors.WHITE, self._score_center())
+        
+        if 'best' in rows:
+            self.numbers.draw(self.screen, 'tiny', self.high_score, Colors.GOLD,
+                              (center_x, rows['best']), label='Best: ')
         
         # Level text
-        level_text = f"LEVEL {self.level}"
-        level_surf = self.text_cache.get('small', level_text, Colors.NEON_PINK)
-        level_rect = level_surf.get_rect(center=(panel_x + panel_width // 2, y))
-        self.screen.blit(level_surf, level_rect)
-        y += 60
+        self.numbers.draw(self.screen, 'small', self.level, Colors.NEON_PINK,
+                          (center_x, rows['level']), label='LEVEL ')
         
         # Moves text
         moves_color = Colors.NEON_GREEN if self.moves_remaining > 10 else Colors.NEON_PINK
-        moves_text = f"MOVES: {self.moves_remaining}"
-        moves_surf = self.text_cache.get('small', moves_text, moves_color)
-        moves_rect = moves_surf.get_rect(center=(panel_x + panel_width // 2, y))
-        self.screen.blit(moves_surf, moves_rect)
-        y += 60
+        self.numbers.draw(self.screen, 'small', self.moves_remaining, moves_color,
+                          (center_x, rows['moves']), label='MOVES: ')
         
-        # QUANTUM ENERGY label
-        energy_label = self.text_cache.get('tiny', 'QUANTUM ENERGY', Colors.NEON_PURPLE)
-        energy_rect = energy_label.get_rect(center=(panel_x + panel_width // 2, y))
-        self.screen.blit(energy_label, energy_rect)
-        y += 35  # Space between label and orbs
-        
-        # Draw quantum energy orbs - PROPERLY ALIGNED NOW
+        orbs = self.layer('orbs', (self.quantum_energy,), self._build_orbs)
+        self.screen.blit(orbs, orbs.get_rect(center=(center_x, rows['orbs'])))
+    
+    def _build_orbs(self) -> pygame.Surface:
+        """The three quantum energy orbs on the panel color, filled up to the current energy"""
         orb_radius = 20
         orb_spacing = 70
-        # Calculate starting x to center all 3 orbs
         total_width = 3 * orb_radius * 2 + 2 * (orb_spacing - orb_radius * 2)
-        start_x = panel_x + (panel_width - total_width) // 2 + orb_radius
+        # One pixel of margin all round so the outlines aren't clipped
+        surf = pygame.Surface((total_width + 2, orb_radius * 2 + 2)).convert()
+        surf.fill(Colors.DARK_CELL)
         
         for i in range(3):
-            orb_x = start_x + i * orb_spacing
-            orb_y = y
-            
-            if i < self.quantum_energy:
-                pygame.draw.circle(self.screen, Colors.NEON_PURPLE, (orb_x, orb_y), orb_radius)
-            else:
-                pygame.draw.circle(self.screen, Colors.DARK_CELL, (orb_x, orb_y), orb_radius)
-            pygame.draw.circle(self.screen, Colors.WHITE, (orb_x, orb_y), orb_radius, 2)
+            center = (1 + orb_radius + i * orb_spacing, 1 + orb_radius)
+            color = Colors.NEON_PURPLE if i < self.quantum_energy else Colors.DARK_CELL
+            pygame.draw.circle(surf, color, center, orb_radius)
+            pygame.draw.circle(surf, Colors.WHITE, center, orb_radius, 2)
+        return surf
     
-    def draw_next_tiles_panel(self):
-        panel_x = self.grid_offset_x + GRID_SIZE * (CELL_SIZE + GRID_PADDING) + 40
-        panel_y = self.grid_offset_y + 440
-        panel_width = 300
-        
-        panel_rect = pygame.Rect(panel_x, panel_y, panel_width, 250)
-        pygame.draw.rect(self.screen, Colors.DARK_CELL, panel_rect, border_radius=15)
-        pygame.draw.rect(self.screen, Colors.NEON_BLUE, panel_rect, 3, border_radius=15)
-        
-        title_surf = self.text_cache.get('medium', 'NEXT TILES', Colors.NEON_BLUE)
-        title_rect = title_surf.get_rect(center=(panel_x + panel_width // 2, panel_y + 30))
-        self.screen.blit(title_surf, title_rect)
-        
-        for i, tile in enumerate(self.next_tiles[:3]):
-            tile_y = panel_y + 80 + i * 55
-            tile_rect = pygame.Rect(panel_x + 50, tile_y, 200, 45)
-            
-            color = Colors.GOLD if i == 0 else Colors.DARK_PURPLE
-            pygame.draw.rect(self.screen, color, tile_rect, border_radius=10)
-            pygame.draw.rect(self.screen, Colors.NEON_BLUE, tile_rect, 2, border_radius=10)
-            
-            tile_surf = self.text_cache.get('large', str(tile), Colors.WHITE)
-            tile_text_rect = tile_surf.get_rect(center=(panel_x + panel_width // 2, tile_y + 22))
-            self.screen.blit(tile_surf, tile_text_rect)
+    def preview_sprites(self) -> List[Tuple[Tuple[int, int], pygame.Rect]]:
+        """(position, atlas area) of the next tiles, the current one in gold"""
+        panel_x, panel_y = self.next_panel_rect.topleft
+        rects = self.sprites.rects
+        return [((panel_x + 50, panel_y + 80 + i * 55), rects[('tile', tile, 0 if i == 0 else 1)])
+                for i, tile in enumerate(self.next_tiles[:3])]
     
-    def draw_rules_panel(self):
-        panel_x = self.grid_offset_x
-        panel_y = self.grid_offset_y + GRID_SIZE * (CELL_SIZE + GRID_PADDING) + 20
-        panel_width = GRID_SIZE * (CELL_SIZE + GRID_PADDING) - 20
+    def _draw_rules_panel(self, surf: pygame.Surface):
+        panel_x = self.viewport.rect.x
+        panel_y = self.viewport.rect.bottom + 20
+        panel_width = self.viewport.rect.width - 20
         
         panel_rect = pygame.Rect(panel_x, panel_y, panel_width, 120)
-        pygame.draw.rect(self.screen, Colors.DARK_CELL, panel_rect, border_radius=15)
-        pygame.draw.rect(self.screen, Colors.NEON_GREEN, panel_rect, 2, border_radius=15)
+        pygame.draw.rect(surf, Colors.DARK_CELL, panel_rect, border_radius=15)
+        pygame.draw.rect(surf, Colors.NEON_GREEN, panel_rect, 2, border_radius=15)
         
         rules = [
             "3+ in a row: Sum=15 (+50) | Prime Product (+75) | Fibonacci (+100) | Powers of 2 (+125)",
@@ -661,27 +1729,29 @@ class QuantumGridGame:
         for rule in rules:
             rule_surf = self.text_cache.get('tiny', rule, Colors.NEON_GREEN)
             rule_rect = rule_surf.get_rect(center=(panel_x + panel_width // 2, y))
-            self.screen.blit(rule_surf, rule_rect)
+            surf.blit(rule_surf, rule_rect)
             y += 35
     
+    def _overlay(self) -> pygame.Surface:
+        """The translucent full-window dimmer shared by the pause and game over screens"""
+        def build():
+            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA).convert_alpha()
+            overlay.fill(Colors.OVERLAY)
+            return overlay
+        return self.layer('overlay', (), build)
+    
     def draw_pause_overlay(self):
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-        overlay.fill(Colors.OVERLAY)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self._overlay(), (0, 0))
         
         paused_surf = self.text_cache.get('title', 'PAUSED', Colors.NEON_YELLOW)
         paused_rect = paused_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 150))
         self.screen.blit(paused_surf, paused_rect)
         
-        mouse_pos = pygame.mouse.get_pos()
         for button_name in ['resume', 'restart', 'menu']:
-            self.buttons[button_name].update(mouse_pos)
             self.buttons[button_name].draw(self.screen)
     
     def draw_game_over(self):
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-        overlay.fill(Colors.OVERLAY)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self._overlay(), (0, 0))
         
         go_surf = self.text_cache.get('title', 'GAME OVER', Colors.NEON_PINK)
         go_rect = go_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 200))
@@ -693,45 +1763,31 @@ class QuantumGridGame:
             reason_rect = reason_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 140))
             self.screen.blit(reason_surf, reason_rect)
         
-        score_surf = self.text_cache.get('medium', f"Final Score: {self.score:,}", Colors.WHITE)
-        score_rect = score_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 80))
-        self.screen.blit(score_surf, score_rect)
+        self.numbers.draw(self.screen, 'medium', self.score, Colors.WHITE,
+                          (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 80), label='Final Score: ')
         
-        level_surf = self.text_cache.get('medium', f"Level Reached: {self.level}", Colors.NEON_GREEN)
-        level_rect = level_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 20))
-        self.screen.blit(level_surf, level_rect)
+        self.numbers.draw(self.screen, 'medium', self.level, Colors.NEON_GREEN,
+                          (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 20), label='Level Reached: ')
         
         if self.score >= self.high_score:
             hs_surf = self.text_cache.get('medium', 'NEW HIGH SCORE!', Colors.GOLD)
             hs_rect = hs_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 30))
             self.screen.blit(hs_surf, hs_rect)
         
-        mouse_pos = pygame.mouse.get_pos()
         for button_name in ['play_again', 'menu_go']:
-            self.buttons[button_name].update(mouse_pos)
             self.buttons[button_name].draw(self.screen)
     
     def draw_tutorial(self):
-        if self.tutorial_page not in self._tutorial_cache:
-            self._tutorial_cache[self.tutorial_page] = self._create_tutorial_page(self.tutorial_page)
-        
-        self.screen.blit(self._tutorial_cache[self.tutorial_page], (0, 0))
-        
-        mouse_pos = pygame.mouse.get_pos()
+        page = self.tutorial_page
+        tutorial_surf = self.layer('tutorial', (page,), lambda: self._create_tutorial_page(page))
         
-        if self.tutorial_page > 0:
-            self.buttons['tutorial_prev'].update(mouse_pos)
-            self.buttons['tutorial_prev'].draw(self.screen)
+        self.screen.blit(tutorial_surf, (0, 0))
         
-        if self.tutorial_page < self.max_tutorial_pages - 1:
-            self.buttons['tutorial_next'].update(mouse_pos)
-            self.buttons['tutorial_next'].draw(self.screen)
-        else:
-            self.buttons['tutorial_close'].update(mouse_pos)
-            self.buttons['tutorial_close'].draw(self.screen)
+        for button_name in self.visible_buttons():
+            self.buttons[button_name].draw(self.screen)
     
     def _create_tutorial_page(self, page: int) -> pygame.Surface:
-        surf = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+        surf = self._background_cache.copy()
         
         title_surf = self.text_cache.get('title', 'TUTORIAL', Colors.NEON_GREEN)
         title_rect = title_surf.get_rect(center=(WINDOW_WIDTH // 2, 80))
@@ -795,171 +1851,76 @@ class QuantumGridGame:
         return surf
     
     def handle_cell_click(self, row: int, col: int):
-        if not (0 <= row < GRID_SIZE and 0 <= col < GRID_SIZE):
-            return
-        
-        cell = self.cells[row][col]
-        
-        if not cell.is_empty():
-            return
-        
-        if not self.next_tiles:
+        before = self.popup_rects() + self.score_panel_rects()
+        result = self.engine.place(row, col)
+        if result is None:
             return
         
-        current = self.next_tiles[0]
-        cell.value = current
-        
-        self.next_tiles.pop(0)
-        self.next_tiles.append(random.randint(1, 9))
-        
-        self.moves_remaining -= 1
-        
-        self.check_patterns()
-        
-        # Check for game over conditions
-        if self.moves_remaining <= 0:
-            self.game_over("No moves remaining!")
-        elif self.is_board_full():
-            self.game_over("BOARD FULL!")
-        
-        self.needs_redraw = True
-    
-    def check_patterns(self):
-        patterns_found = 0
-        total_points = 0
-        matched_cells: Set[Tuple[int, int]] = set()
-        
-        # Check rows and columns
-        for i in range(GRID_SIZE):
-            row_values = [self.cells[i][j].value for j in range(GRID_SIZE)]
-            points, matches = self.check_line(row_values)
-            if points > 0:
-                patterns_found += 1
-                total_points += points
-                matched_cells.update([(i, j) for j in matches])
-            
-            col_values = [self.cells[j][i].value for j in range(GRID_SIZE)]
-            points, matches = self.check_line(col_values)
-            if points > 0:
-                patterns_found += 1
-                total_points += points
-                matched_cells.update([(j, i) for j in matches])
-        
-        # Check diagonals
-        diag1 = [self.cells[i][i].value for i in range(GRID_SIZE)]
-        diag2 = [self.cells[i][GRID_SIZE-1-i].value for i in range(GRID_SIZE)]
-        
-        for diag_idx, diag in enumerate([diag1, diag2]):
-            points, matches = self.check_line(diag)
-            if points > 0:
-                patterns_found += 1
-                total_points += points
-                if diag_idx == 0:
-                    matched_cells.update([(i, i) for i in matches])
-                else:
-                    matched_cells.update([(i, GRID_SIZE-1-i) for i in matches])
-        
-        self.combo_count = patterns_found
-        if patterns_found > 1:
-            total_points *= patterns_found
-        
-        if matched_cells:
-            for row, col in matched_cells:
-                self.cells[row][col].highlight = True
-        
-        if total_points > 0:
-            self.last_score_gain = total_points
+        # Cells that were already gold only restart their timer; they look the same
+        changed = [self.cells[row][col]]
+        for r, c in result.matched:
+            cell = self.cells[r][c]
+            if not cell.highlight:
+                self.highlighted.append(cell)
+                changed.append(cell)
+            cell.highlight = True
+            cell.highlight_time = 0.0
+        self.cells_changed(changed)
+        
+        if result.points > 0:
+            self.last_score_gain = result.points
             self.last_score_time = 0.0
-            self.score += total_points
             
             if self.score > self.high_score:
                 self.high_score = self.score
                 self.save_high_score()
-            
-            new_level = (self.score // 1000) + 1
-            if new_level > self.level:
-                self.level = new_level
-                self.moves_remaining += 10
-                self.quantum_energy = min(3, self.quantum_energy + 1)
-    
-    def check_line(self, line: List[Optional[int]]) -> Tuple[int, List[int]]:
-        numbers = [(i, x) for i, x in enumerate(line) if x is not None and 1 <= x <= 9]
-        
-        if len(numbers) < 3:
-            return 0, []
         
-        points = 0
-        matches = set()
-        
-        for i in range(len(numbers) - 2):
-            seq_indices = [numbers[i][0], numbers[i+1][0], numbers[i+2][0]]
-            seq = [numbers[i][1], numbers[i+1][1], numbers[i+2][1]]
-            
-            # Sum = 15
-            if sum(seq) == 15:
-                points += 50
-                matches.update(seq_indices)
-            
-            # Prime product
-            product = seq[0] * seq[1] * seq[2]
-            if self.is_prime(product):
-                points += 75
-                matches.update(seq_indices)
-            
-            # Fibonacci
-            if seq[0] + seq[1] == seq[2]:
-                points += 100
-                matches.update(seq_indices)
-            
-            # Powers of 2
-            if all(self.is_power_of_2(x) for x in seq):
-                points += 125
-                matches.update(seq_indices)
+        self.invalidate(*before, *self.popup_rects(), *self.score_panel_rects(), self.next_panel_rect)
         
-        return points, list(matches)
-    
-    @staticmethod
-    def is_prime(n: int) -> bool:
-        if n < 2:
-            return False
-        if n == 2:
-            return True
-        if n % 2 == 0:
-            return False
-        # Optimized: only check up to sqrt(n)
-        sqrt_n = int(math.sqrt(n)) + 1
-        for i in range(3, sqrt_n, 2):
-            if n % i == 0:
-                return False
-        return True
-    
-    @staticmethod
-    def is_power_of_2(n: int) -> bool:
-        # Optimized bit manipulation
-        return n > 0 and (n &  (n - 1)) == 0
+        if self.engine.is_over:
+            self.game_over()
+        else:
+            self.save_snapshot()
     
     def use_quantum_power(self):
-        if self.quantum_energy > 0 and self.state == GameState.PLAYING:
-            self.quantum_energy -= 1
-            self.moves_remaining += 5
-            self.needs_redraw = True
+        if self.state == GameState.PLAYING and self.engine.use_quantum_power():
+            self.invalidate(*self.score_panel_rects())
+            self.save_snapshot()
     
-    def game_over(self, reason: str = ""):
-        """End the game with a specific reason"""
-        self.game_over_reason = reason
+    def game_over(self):
+        """End the game; the engine has already recorded the reason"""
+        reason = self.game_over_reason
         self.state = GameState.GAME_OVER
         self.needs_redraw = True
+        self.saver.remove(SNAPSHOT_FILE)
+        self.saver.flush(wait=False)
+        if self.history:
+            record = record_game(self.engine, self.player, time.monotonic() - self.game_started)
+            self.history.add(record)
+            # The menu's top games, kept current without waiting for the insert
+            self.leaderboard = sorted(self.leaderboard + [record],
+                                      key=lambda game: game.score, reverse=True)[:LEADERBOARD_SIZE]
         print(f"\nGame Over: {reason}")
         print(f"   Final Score: {self.score:,}")
         print(f"   Level: {self.level}\n")
     
-    def handle_events(self):
+    def handle_events(self, first: Optional[pygame.event.Event] = None):
         mouse_pos = pygame.mouse.get_pos()
+        events = pygame.event.get()
+        if first is not None:
+            events.insert(0, first)
         
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             
+            elif event.type in SUSPEND_EVENTS:
+                self.suspended = True
+            
+            elif event.type in RESUME_EVENTS:
+                self.suspended = False
+                self.needs_redraw = True
+            
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 current_time = pygame.time.get_ticks()
                 if current_time - self.last_click_time < CLICK_COOLDOWN:
@@ -969,21 +1930,19 @@ class QuantumGridGame:
                 self._handle_mouse_click(mouse_pos)
             
             elif event.type == pygame.MOUSEMOTION:
+                self.update_hover(mouse_pos)
                 if self.state == GameState.PLAYING:
-                    # Optimized: only check cells if mouse is in grid area
-                    grid_left = self.grid_offset_x
-                    grid_right = self.grid_offset_x + GRID_SIZE * (CELL_SIZE + GRID_PADDING)
-                    grid_top = self.grid_offset_y
-                    grid_bottom = self.grid_offset_y + GRID_SIZE * (CELL_SIZE + GRID_PADDING)
-                    
-                    if grid_left <= mouse_pos[0] <= grid_right and grid_top <= mouse_pos[1] <= grid_bottom:
-                        for row in self.cells:
-                            for cell in row:
-                                old_hover = cell.hover
-                                cell_rect = pygame.Rect(cell.x, cell.y, cell.size, cell.size)
-                                cell.hover = cell_rect.collidepoint(mouse_pos) and cell.is_empty()
-                                if old_hover != cell.hover:
-                                    self.needs_redraw = True
+                    # Right-drag pans a large board
+                    if event.buttons[2] and self.viewport.movable and \
+                       self.viewport.scroll_by(-event.rel[0], -event.rel[1]):
+                        self.view_changed()
+                    self.update_cell_hover(mouse_pos)
+            
+            elif event.type == pygame.MOUSEWHEEL and self.state == GameState.PLAYING \
+                    and self.viewport.movable:
+                if self.viewport.rect.collidepoint(mouse_pos) and \
+                   self.viewport.zoom_at(event.y, mouse_pos):
+                    self.view_changed()
             
             elif event.type == pygame.KEYDOWN:
                 self._handle_keypress(event.key)
@@ -1016,12 +1975,9 @@ class QuantumGridGame:
                 self.tutorial_page = 0
                 self.needs_redraw = True
             else:
-                for row in self.cells:
-                    for cell in row:
-                        cell_rect = pygame.Rect(cell.x, cell.y, cell.size, cell.size)
-                        if cell_rect.collidepoint(mouse_pos):
-                            self.handle_cell_click(cell.row, cell.col)
-                            return
+                hit = self.viewport.cell_at(mouse_pos)
+                if hit:
+                    self.handle_cell_click(*hit)
         
         elif self.state == GameState.PAUSED:
             if self.buttons['resume'].is_clicked(mouse_pos):
@@ -1097,6 +2053,28 @@ class QuantumGridGame:
             self.show_fps = not self.show_fps
             self.needs_redraw = True
             print(f"FPS Display: {'ON' if self.show_fps else 'OFF'}")
+        
+        elif key == pygame.K_F9:
+            self.toggle_capture()
+        
+        elif key in SCROLL_KEYS and self.state == GameState.PLAYING and self.viewport.movable:
+            dx, dy = SCROLL_KEYS[key]
+            step = SCROLL_CELLS * self.viewport.pitch
+            if self.viewport.scroll_by(dx * step, dy * step):
+                self.view_changed()
+        
+        elif key in ZOOM_KEYS and self.state == GameState.PLAYING and self.viewport.movable:
+            if self.viewport.zoom_at(ZOOM_KEYS[key], self.viewport.rect.center):
+                self.view_changed()
+    
+    def toggle_capture(self):
+        if self.capture.active:
+            path = self.capture.stop()
+            if path:
+                print(f"Capture written: {path}")
+        else:
+            self.capture.start(self.state)
+            print(f"Capturing {STATE_NAMES[self.state]} (F9 to stop)")
     
     def run(self):
         print(f"\n{'='*60}")
@@ -1107,31 +2085,129 @@ class QuantumGridGame:
         print("Controls:")
         print("  Mouse: Click to interact")
         print("  N: New Game | P: Pause | H: Help | Q: Quantum Power")
-        print("  F: Toggle FPS | ESC: Pause/Back/Quit\n")
+        print("  F: Toggle FPS | F9: Profile capture | ESC: Pause/Back/Quit")
+        print("  Arrows/right-drag: Scroll | Wheel/+/-: Zoom\n")
         print("All buttons respond INSTANTLY!\n")
         
+        if self.capture_at_start:
+            self.toggle_capture()
+        
+        with self.profile.phase('first frame'):
+            self.frames.start_frame()
+            self.draw()
+            self.frames.end_frame()
+        self.profile.report()
+        
         while self.running:
-            dt = self.clock.tick(FPS) / 1000.0
+            if self.show_fps and not self.suspended:
+                # Frame-paced while the FPS display is on, so it measures something
+                dt = self.clock.tick(FPS) / 1000.0
+                self.frames.start_frame()
+                self.handle_events()
+                self.frames.lap('events')
+                self.update(min(dt, 0.1))
+            else:
+                # Idle: sleep until input or the next timer. dt is the real
+                # time waited, so timers expire on schedule
+                event = self.wait_for_event()
+                dt = self.clock.tick() / 1000.0
+                self.frames.start_frame()
+                self.handle_events(event)
+                self.frames.lap('events')
+                self.update(dt)
+            if self.capture.active and self.capture.state != self.state:
+                path = self.capture.rotate(self.state)
+                if path:
+                    print(f"Capture written: {path}")
+            self.frames.lap('update')
             
-            self.handle_events()
-            self.update(dt)
-            self.draw()
+            if not self.suspended:
+                self.draw()
+                self.frames.lap('draw')
+            self.frames.end_frame()
         
         print("\nThanks for playing QuantumGrid ULTIMATE!")
         print(f"   Final High Score: {self.high_score:,}\n")
+        stats = self.surfaces.stats()
+        print(f"Surface cache: {stats['entries']} entries, {stats['bytes'] / 1048576:.1f} of "
+              f"{stats['budget'] / 1048576:.0f} MB, {stats['hits']:,} hits, "
+              f"{stats['misses']:,} misses, {stats['evictions']:,} evictions")
+        self.shutdown()
+    
+    def shutdown(self):
+        """Save the high score and any game in progress, then release everything
+
+        Also called by main() after a crash, so an unfinished game can be resumed.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.capture.active:
+            self.toggle_capture()
+        self.frames.close()
+        if self.game_in_progress():
+            self.save_snapshot()
         self.save_high_score()
+        self.saver.close()
+        if self.history:
+            self.history.close()
+        if self.saver.errors:
+            print(f"{self.saver.errors} save(s) failed, last error: {self.saver.last_error}")
         pygame.quit()
 
-def main():
+def default_player() -> str:
     try:
-        game = QuantumGridGame()
+        return getpass.getuser()
+    except Exception:  # no login name in some containers and services
+        return 'player'
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=f"QuantumGrid v{VERSION}")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="print how long each startup phase took")
+    parser.add_argument('--cache-budget', type=int, default=CACHE_BUDGET_MB, metavar='MB',
+                        help=f"memory for cached surfaces (default {CACHE_BUDGET_MB})")
+    parser.add_argument('--frame-csv', metavar='PATH',
+                        help="write per-frame phase timings to a CSV file")
+    parser.add_argument('--capture', action='store_true',
+                        help="cProfile and tracemalloc capture from launch, one per game state")
+    parser.add_argument('--player', default=default_player(),
+                        help="name recorded with each finished game (default: login name)")
+    parser.add_argument('--board-size', type=int, default=GRID_SIZE, metavar='N',
+                        help=f"board of NxN cells: {GRID_SIZE}, or {LARGE_BOARD_MIN}-{MAX_GRID_SIZE} "
+                             f"for a large board that scrolls and zooms (default {GRID_SIZE})")
+    args = parser.parse_args(argv)
+    if args.board_size != GRID_SIZE and not LARGE_BOARD_MIN <= args.board_size <= MAX_GRID_SIZE:
+        parser.error(f"--board-size must be {GRID_SIZE} or {LARGE_BOARD_MIN}-{MAX_GRID_SIZE}")
+    
+    game = None
+    try:
+        game = QuantumGridGame(startup_profile=args.startup_profile,
+                               cache_budget_mb=args.cache_budget,
+                               frame_csv=args.frame_csv, capture=args.capture,
+                               player=args.player, board_size=args.board_size)
         game.run()
     except Exception as e:
         print(f"\nError: {e}")
         import traceback
         traceback.print_exc()
+        if game is not None:
+            try:
+                game.shutdown()  # keep the game in progress and the high score
+                if game.game_in_progress():
+                    print("Your game was saved and will resume on the next launch.")
+            except Exception as save_error:
+                print(f"Could not save the game: {save_error}")
         input("\nPress Enter to exit...")
         sys.exit(1)
 
+def tournament():
+    """Headless Monte Carlo games: python quantumgrid.py tournament --games N"""
+    from quantumgrid_tournament import main as tournament_main
+    tournament_main(sys.argv[2:])
+
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ['tournament']:
+        tournament()
+    else:
+        main()
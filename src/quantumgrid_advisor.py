@@ -0,0 +1,240 @@
+"""
+QuantumGrid move advisor - expectimax search over placements
+
+The preview shows the next three tiles; every tile after that is uniform
+over 1-9. The advisor searches placements of the known tiles as max
+nodes and averages over the nine possible tiles once the preview runs
+out. A move's value is the points it scores (every existing pattern pays
+again on each move), and a leaf is valued at what the board would pay on
+the following move.
+
+Search deepens one ply at a time until the time budget runs out. Root
+moves are spread across a process pool and each worker keeps its own
+transposition table keyed on the board contents plus the remaining
+preview.
+
+Usage:
+    with Advisor(workers=4) as advisor:
+        for hint in advisor.advise(game.engine, time_budget=0.5)[:3]:
+            print(hint.row, hint.col, hint.value)
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from quantumgrid_board import Board
+from quantumgrid_engine import GameEngine, LineEvaluator, board_lines, MIN_TILE, MAX_TILE
+
+TILE_VALUES = tuple(range(MIN_TILE, MAX_TILE + 1))
+TABLE_LIMIT = 500_000
+DEADLINE_CHECK_INTERVAL = 512
+
+
+class Suggestion(NamedTuple):
+    """A ranked placement for the current tile"""
+    row: int
+    col: int
+    value: float
+    depth: int
+
+
+class _Timeout(Exception):
+    pass
+
+
+class _Search:
+    """Expectimax over one board with make/unmake moves and a transposition table"""
+    def __init__(self, line_table: Optional[str] = None, table_limit: int = TABLE_LIMIT):
+        self.scorer = None
+        if line_table:
+            from quantumgrid_linetable import LineTable
+            self.scorer = LineTable(line_table).score
+        self.table_limit = table_limit
+        self.table: Dict[Tuple, float] = {}
+        self.board: Optional[Board] = None
+        self.evaluator: Optional[LineEvaluator] = None
+        self.deadline: Optional[float] = None
+        self.nodes = 0
+
+    def load(self, values: bytes, size: int):
+        self.board = Board(size)
+        self.board.load(values)
+        self.evaluator = LineEvaluator(board_lines(size), self.scorer, size)
+        self.evaluator.rescan(self.board)
+        if len(self.table) > self.table_limit:
+            self.table.clear()
+
+    def root_values(self, values: bytes, size: int, preview: Tuple[int, ...], moves: int,
+                    depth: int, cells: List[int], deadline: Optional[float]) -> Optional[List[float]]:
+        """Values of placing preview[0] at each cell, or None if the deadline passed"""
+        self.load(values, size)
+        self.deadline = deadline
+        try:
+            return [self._after_move(cell, preview[0], depth, preview[1:], moves) for cell in cells]
+        except _Timeout:
+            return None
+
+    def _play(self, cell: int, tile: int):
+        board = self.board
+        evaluator = self.evaluator
+        board.values[cell] = tile
+        board.occupied |= 1 << cell
+        saved = [(i, evaluator.results[i]) for i in evaluator.cell_lines[cell]]
+        for i, _ in saved:
+            evaluator.score_line(board, i)
+        return evaluator.payout(), saved
+
+    def _undo(self, cell: int, saved):
+        self.board.values[cell] = 0
+        self.board.occupied &= ~(1 << cell)
+        evaluator = self.evaluator
+        for i, result in reversed(saved):
+            evaluator.set_result(i, result)
+
+    def _after_move(self, cell: int, tile: int, depth: int, preview: Tuple[int, ...],
+                    moves: int) -> float:
+        gain, saved = self._play(cell, tile)
+        try:
+            return gain + self._value(depth - 1, preview, moves - 1)
+        finally:
+            self._undo(cell, saved)
+
+    def _value(self, depth: int, preview: Tuple[int, ...], moves: int) -> float:
+        board = self.board
+        if moves <= 0 or board.is_full():
+            return 0.0
+        if depth <= 0:
+            return float(self.evaluator.payout())
+
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % DEADLINE_CHECK_INTERVAL == 0:
+            if time.time() > self.deadline:
+                raise _Timeout()
+
+        key = (board.key(), preview[:depth], depth, min(moves, depth + 1))
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+
+        if preview:
+            value = self._best(preview[0], depth, preview[1:], moves)
+        else:
+            # Chance node: the next unseen tile is uniform over 1-9
+            value = sum(self._best(tile, depth, (), moves) for tile in TILE_VALUES) / len(TILE_VALUES)
+
+        self.table[key] = value
+        return value
+
+    def _best(self, tile: int, depth: int, preview: Tuple[int, ...], moves: int) -> float:
+        best = 0.0
+        for cell in list(self.board.empty_cells()):
+            value = self._after_move(cell, tile, depth, preview, moves)
+            if value > best:
+                best = value
+        return best
+
+
+# Worker process state, created once per process by the pool initializer
+_worker_search: Optional[_Search] = None
+
+
+def _init_worker(line_table: Optional[str]):
+    global _worker_search
+    _worker_search = _Search(line_table)
+
+
+def _worker_root_value(values: bytes, size: int, preview: Tuple[int, ...], moves: int,
+                       depth: int, cell: int, deadline: Optional[float]) -> Optional[float]:
+    results = _worker_search.root_values(values, size, preview, moves, depth, [cell], deadline)
+    return None if results is None else results[0]
+
+
+class Advisor:
+    """Ranks placements for a game within a time budget
+
+    workers=0 searches in this process; otherwise root moves are
+    evaluated in a process pool (default: one worker per core). Pass
+    line_table to have workers share a memory-mapped line table.
+    """
+    def __init__(self, workers: Optional[int] = None, line_table: Optional[str] = None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.line_table = str(line_table) if line_table else None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._local: Optional[_Search] = None
+
+    def _evaluate_roots(self, values: bytes, size: int, preview: Tuple[int, ...], moves: int,
+                        depth: int, cells: List[int],
+                        deadline: Optional[float]) -> Optional[List[float]]:
+        """Values for every root cell at this depth, or None if the budget ran out"""
+        if self.workers <= 0:
+            if self._local is None:
+                self._local = _Search(self.line_table)
+            return self._local.root_values(values, size, preview, moves, depth, cells, deadline)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                             initargs=(self.line_table,))
+        futures = [self._pool.submit(_worker_root_value, values, size, preview, moves,
+                                     depth, cell, deadline) for cell in cells]
+        timeout = None if deadline is None else max(0.0, deadline - time.time())
+        done, pending = wait(futures, timeout=timeout)
+        if pending:
+            for future in pending:
+                future.cancel()
+            return None
+        results = [future.result() for future in futures]
+        if any(value is None for value in results):
+            return None
+        return results
+
+    def advise(self, engine: GameEngine, time_budget: float = 1.0,
+               max_depth: int = 3) -> List[Suggestion]:
+        """Placements for the current tile, best first
+
+        Depth 1 (immediate points) always completes; deeper searches
+        are used only if they finish within the budget.
+        """
+        if engine.is_over or not engine.next_tiles:
+            return []
+
+        board = engine.board
+        cells = list(board.empty_cells())
+        values = board.key()
+        preview = tuple(engine.next_tiles)
+        moves = engine.moves_remaining
+        deadline = time.time() + time_budget
+        max_depth = max(1, min(max_depth, len(cells), moves))
+
+        ranked: List[Suggestion] = []
+        for depth in range(1, max_depth + 1):
+            results = self._evaluate_roots(values, board.size, preview, moves, depth, cells,
+                                           None if depth == 1 else deadline)
+            if results is None:
+                break
+            ranked = sorted(
+                (Suggestion(cell // board.size, cell % board.size, value, depth)
+                 for cell, value in zip(cells, results)),
+                key=lambda s: (-s.value, s.row, s.col))
+            if time.time() >= deadline:
+                break
+        return ranked
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def advise(engine: GameEngine, time_budget: float = 1.0, max_depth: int = 3) -> List[Suggestion]:
+    """One-off in-process search; use Advisor to reuse a worker pool"""
+    return Advisor(workers=0).advise(engine, time_budget, max_depth)
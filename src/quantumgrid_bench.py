@@ -0,0 +1,289 @@
+"""
+QuantumGrid engine micro-benchmarks
+
+Times the rule hot paths without rendering, over fixed seeded board
+corpora (empty, half-full and near-full boards):
+
+    is_prime           trial division on line products
+    check_line         plain, memoized and (if built) line-table scoring
+    check_patterns     full rescan and incremental update
+    place              GameEngine.place, i.e. handle_cell_click's rules
+    advisor            a depth-2 in-process search
+    full_game          a complete random-policy game
+
+Each benchmark reports ops/sec and per-op p50/p95/p99 in microseconds.
+Results are written as JSON; `compare` flags benchmarks whose
+throughput dropped by more than a threshold against a stored baseline.
+
+Usage:
+    python quantumgrid_bench.py run --output bench.json
+    python quantumgrid_bench.py compare baseline.json bench.json --threshold 0.10
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import quantumgrid_engine as engine
+from quantumgrid_advisor import Advisor
+from quantumgrid_engine import GameEngine
+
+# A benchmark body: runs one batch and returns (ops, seconds spent on them)
+Bench = Callable[[], Tuple[int, float]]
+
+CORPORA = {'empty': 0, 'half': 24, 'near_full': 45}
+CORPUS_SIZE = 200
+DEFAULT_SAMPLES = 30
+DEFAULT_THRESHOLD = 0.10
+
+
+def make_corpus(filled: int, seed: int, count: int = CORPUS_SIZE) -> List[GameEngine]:
+    """Games with `filled` tiles placed at seeded random cells"""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        game = GameEngine(seed=rng.getrandbits(64))
+        game.moves_remaining = 10 ** 6  # keep corpus games alive
+        for cell in rng.sample(range(engine.GRID_SIZE ** 2), filled):
+            game.place(cell // engine.GRID_SIZE, cell % engine.GRID_SIZE)
+        games.append(game)
+    return games
+
+
+def measure(func: Bench, samples: int, min_time: float = 0.02) -> Dict:
+    """Run func, which returns (ops, seconds spent on them), in timed batches
+
+    Each sample repeats func until min_time of measured work has passed;
+    the per-op time of each sample feeds the percentiles.
+    """
+    func()  # warm up caches
+    per_op = []
+    total_ops = 0
+    total_time = 0.0
+    for _ in range(samples):
+        ops = 0
+        elapsed = 0.0
+        while elapsed < min_time:
+            batch_ops, batch_time = func()
+            ops += batch_ops
+            elapsed += batch_time
+        per_op.append(elapsed / ops)
+        total_ops += ops
+        total_time += elapsed
+    per_op.sort()
+
+    def pct(q: float) -> float:
+        return per_op[min(len(per_op) - 1, int(q * len(per_op)))] * 1e6
+
+    return {
+        'ops_per_sec': total_ops / total_time,
+        'p50_us': pct(0.50),
+        'p95_us': pct(0.95),
+        'p99_us': pct(0.99),
+        'ops': total_ops,
+    }
+
+
+def corpus_lines(games: List[GameEngine]) -> List[bytes]:
+    return [bytes(game.board.values[s]) for game in games for s in game.evaluator.slices]
+
+
+def bench_is_prime(games: List[GameEngine]) -> Bench:
+    products = []
+    for line in corpus_lines(games):
+        tiles = [v for v in line if v]
+        for i in range(len(tiles) - 2):
+            products.append(tiles[i] * tiles[i + 1] * tiles[i + 2])
+    products = products or [1]
+
+    def run() -> Tuple[int, float]:
+        is_prime = engine.is_prime
+        start = time.perf_counter()
+        for n in products:
+            is_prime(n)
+        return len(products), time.perf_counter() - start
+    return run
+
+
+def bench_check_line(games: List[GameEngine], scorer=None) -> Bench:
+    lines = corpus_lines(games)
+    score = scorer or engine.check_line
+
+    def run() -> Tuple[int, float]:
+        start = time.perf_counter()
+        for line in lines:
+            score(line)
+        return len(lines), time.perf_counter() - start
+    return run
+
+
+def bench_check_patterns_full(games: List[GameEngine]) -> Bench:
+    def run() -> Tuple[int, float]:
+        start = time.perf_counter()
+        for game in games:
+            game.check_patterns()
+        return len(games), time.perf_counter() - start
+    return run
+
+
+def bench_check_patterns_incremental(games: List[GameEngine]) -> Bench:
+    # Rescore the lines through one occupied cell (any cell on an empty board)
+    cells = []
+    for game in games:
+        occupied = [i for i, v in enumerate(game.board.values) if v] or [0]
+        cells.append(occupied[len(occupied) // 2])
+
+    def run() -> Tuple[int, float]:
+        size = engine.GRID_SIZE
+        start = time.perf_counter()
+        for game, cell in zip(games, cells):
+            game.check_patterns(cell // size, cell % size)
+        return len(games), time.perf_counter() - start
+    return run
+
+
+def bench_place(games: List[GameEngine]) -> Bench:
+    """One placement per corpus game; cloning the game is not timed"""
+    size = engine.GRID_SIZE
+    targets = [next(game.board.empty_cells()) for game in games]
+
+    def run() -> Tuple[int, float]:
+        trials = [game.copy() for game in games]
+        start = time.perf_counter()
+        for trial, cell in zip(trials, targets):
+            trial.place(cell // size, cell % size)
+        return len(trials), time.perf_counter() - start
+    return run
+
+
+def bench_advisor(games: List[GameEngine], count: int = 10) -> Bench:
+    """Depth-2 advice on a few corpus games, each batch from a cold transposition table"""
+    games = [game for game in games if not game.is_over][:count]
+
+    def run() -> Tuple[int, float]:
+        advisor = Advisor(workers=0)
+        start = time.perf_counter()
+        for game in games:
+            advisor.advise(game, time_budget=60.0, max_depth=2)
+        return len(games), time.perf_counter() - start
+    return run
+
+
+def bench_full_game(seed: int) -> Bench:
+    rng = random.Random(seed)
+    game = GameEngine()
+
+    def run() -> Tuple[int, float]:
+        start = time.perf_counter()
+        game.reset(rng.getrandbits(64))
+        size = game.board.size
+        while not game.is_over:
+            if game.moves_remaining <= 1 and game.quantum_energy > 0:
+                game.use_quantum_power()
+            cell = rng.choice(list(game.board.empty_cells()))
+            game.place(cell // size, cell % size)
+        return 1, time.perf_counter() - start
+    return run
+
+
+def run_benchmarks(samples: int = DEFAULT_SAMPLES, seed: int = 1,
+                   line_table: Optional[str] = None,
+                   only: Optional[List[str]] = None) -> Dict:
+    """Run the suite and return a JSON-serializable result document"""
+    scorer = None
+    if line_table:
+        from quantumgrid_linetable import LineTable
+        scorer = LineTable(line_table).check_line
+
+    cases: Dict[str, Bench] = {}
+    for corpus, filled in CORPORA.items():
+        games = make_corpus(filled, seed)
+        cases[f'is_prime/{corpus}'] = bench_is_prime(games)
+        cases[f'check_line/{corpus}'] = bench_check_line(games)
+        cases[f'check_line_cached/{corpus}'] = bench_check_line(games, engine.check_line_cached)
+        if scorer:
+            cases[f'check_line_table/{corpus}'] = bench_check_line(games, scorer)
+        cases[f'check_patterns_full/{corpus}'] = bench_check_patterns_full(games)
+        cases[f'check_patterns_incremental/{corpus}'] = bench_check_patterns_incremental(games)
+        cases[f'place/{corpus}'] = bench_place(games)
+        cases[f'advisor/{corpus}'] = bench_advisor(games)
+    cases['full_game'] = bench_full_game(seed)
+
+    results = {}
+    for name, func in cases.items():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        results[name] = measure(func, samples)
+        print(f"  {name:<40} {results[name]['ops_per_sec']:>14,.0f} ops/s", file=sys.stderr)
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Names of benchmarks whose ops/sec fell by more than threshold"""
+    regressions = []
+    print(f"  {'benchmark':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"  {name:<40} {'-':>12} {result['ops_per_sec']:>12,.0f}      new")
+            continue
+        change = result['ops_per_sec'] / base['ops_per_sec'] - 1.0
+        flag = ''
+        if change < -threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"  {name:<40} {base['ops_per_sec']:>12,.0f} {result['ops_per_sec']:>12,.0f} "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="QuantumGrid engine micro-benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+    run_cmd = sub.add_parser('run', help="run the suite and write JSON results")
+    run_cmd.add_argument('--output', '-o', help="JSON file (default: stdout)")
+    run_cmd.add_argument('--samples', type=int, default=DEFAULT_SAMPLES)
+    run_cmd.add_argument('--seed', type=int, default=1)
+    run_cmd.add_argument('--line-table', help="also benchmark a built line table")
+    run_cmd.add_argument('--only', nargs='*', help="benchmark name prefixes to run")
+    cmp_cmd = sub.add_parser('compare', help="flag regressions against a baseline")
+    cmp_cmd.add_argument('baseline')
+    cmp_cmd.add_argument('current')
+    cmp_cmd.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                         help="allowed fractional drop in ops/sec (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        document = run_benchmarks(args.samples, args.seed, args.line_table, args.only)
+        text = json.dumps(document, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(text + '\n')
+        else:
+            print(text)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+QuantumGrid compact board state
+
+A board is an occupancy bitmask (one bit per cell, row-major) plus a
+packed bytearray of tile values where 0 means empty. Fullness is a
+single integer compare, empty cells are enumerated straight from the
+mask, and copying or hashing touches only one int and size*size bytes.
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+
+class Board:
+    """Occupancy mask plus packed values for a size x size grid"""
+    __slots__ = ('size', 'occupied', 'values', 'full_mask')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.full_mask = (1 << (size * size)) - 1
+        self.occupied = 0
+        self.values = bytearray(size * size)
+
+    def clear(self):
+        """Empty every cell in place so existing views stay valid"""
+        self.occupied = 0
+        self.values[:] = bytes(len(self.values))
+
+    def get(self, row: int, col: int) -> Optional[int]:
+        return self.values[row * self.size + col] or None
+
+    def set(self, row: int, col: int, value: int):
+        index = row * self.size + col
+        self.values[index] = value
+        self.occupied |= 1 << index
+
+    def is_empty(self, row: int, col: int) -> bool:
+        return not (self.occupied >> (row * self.size + col)) & 1
+
+    def is_full(self) -> bool:
+        return self.occupied == self.full_mask
+
+    def empty_count(self) -> int:
+        return bin(self.full_mask & ~self.occupied).count('1')
+
+    def empty_cells(self) -> Iterator[int]:
+        """Flat indices (row * size + col) of empty cells in ascending order"""
+        free = self.full_mask & ~self.occupied
+        while free:
+            low = free & -free
+            yield low.bit_length() - 1
+            free ^= low
+
+    def load(self, values: bytes):
+        """Replace the contents with packed values (0 = empty)"""
+        if len(values) != len(self.values):
+            raise ValueError(f"Expected {len(self.values)} cell values, got {len(values)}")
+        self.values[:] = values
+        occupied = 0
+        for index, value in enumerate(self.values):
+            if value:
+                occupied |= 1 << index
+        self.occupied = occupied
+
+    def rows(self) -> List[List[Optional[int]]]:
+        """Nested lists with None for empty cells"""
+        size = self.size
+        return [[v or None for v in self.values[r * size:(r + 1) * size]] for r in range(size)]
+
+    def copy(self) -> "Board":
+        clone = Board.__new__(Board)
+        clone.size = self.size
+        clone.full_mask = self.full_mask
+        clone.occupied = self.occupied
+        clone.values = bytearray(self.values)
+        return clone
+
+    def key(self) -> bytes:
+        """Immutable snapshot of the contents, usable as a dict key"""
+        return bytes(self.values)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Board) and self.values == other.values
+
+    def __hash__(self) -> int:
+        # Hashes the current contents; don't mutate a board used as a key
+        return hash(bytes(self.values))
+
+    def __repr__(self) -> str:
+        return f"Board({self.size}, filled={self.size * self.size - self.empty_count()})"
+
+
+def line_slice(cells: List[Tuple[int, int]], size: int) -> slice:
+    """Slice of Board.values covering a straight line of cells"""
+    first = cells[0][0] * size + cells[0][1]
+    if len(cells) == 1:
+        return slice(first, first + 1)
+    step = (cells[1][0] * size + cells[1][1]) - first
+    for i, (row, col) in enumerate(cells):
+        if row * size + col != first + i * step:
+            raise ValueError("Cells are not evenly spaced in row-major order")
+    stop = first + step * len(cells)
+    return slice(first, stop if stop >= 0 else None, step)
@@ -0,0 +1,742 @@
+"""
+QuantumGrid rules engine - no pygame required
+
+Holds every game rule (placement, pattern scoring, combos, level-up and
+move accounting, quantum power) so they can run without a display.
+QuantumGridGame drives a GameEngine for interactive play; BatchEngine
+steps thousands of games per call over an (N, 7, 7) NumPy board array
+for balance and regression simulations.
+
+Usage:
+    from quantumgrid_engine import GameEngine, BatchEngine
+
+    game = GameEngine()
+    result = game.place(3, 3)
+
+    batch = BatchEngine(10000, seed=1)
+    points = batch.step(actions)
+"""
+
+import math
+import random
+from array import array
+from functools import lru_cache
+from typing import Callable, List, Tuple, Optional, Set, Dict, NamedTuple
+
+from quantumgrid_board import Board, line_slice
+
+try:
+    import numpy as np
+except ImportError:  # Only the batched API needs NumPy
+    np = None
+
+# Rules
+GRID_SIZE = 7
+MAX_GRID_SIZE = 101
+MIN_TILE = 1
+MAX_TILE = 9
+PREVIEW_SIZE = 3
+START_MOVES = 25
+START_QUANTUM_ENERGY = 3
+MAX_QUANTUM_ENERGY = 3
+QUANTUM_BONUS_MOVES = 5
+LEVEL_POINTS = 1000
+LEVEL_BONUS_MOVES = 10
+
+REASON_NO_MOVES = "No moves remaining!"
+REASON_BOARD_FULL = "BOARD FULL!"
+
+# Move history: one event per move, a flat cell index or quantum power.
+# Boards up to 15x15 use one byte per event; larger ones two (uint16).
+QUANTUM_EVENT = 0xFF
+WIDE_QUANTUM_EVENT = 0xFFFF
+
+
+def is_wide(size: int) -> bool:
+    """Whether a size x size board needs two-byte history events"""
+    return size * size >= QUANTUM_EVENT
+
+
+def new_history(size: int):
+    """An empty move history for the board size: a bytearray, or array('H') when wide"""
+    return array('H') if is_wide(size) else bytearray()
+
+
+def build_lines(size: int) -> List[List[Tuple[int, int]]]:
+    """Every line that can score: rows, columns and both diagonals"""
+    lines = []
+    for i in range(size):
+        lines.append([(i, j) for j in range(size)])
+        lines.append([(j, i) for j in range(size)])
+    lines.append([(i, i) for i in range(size)])
+    lines.append([(i, size - 1 - i) for i in range(size)])
+    return lines
+
+
+LINES = build_lines(GRID_SIZE)
+
+
+@lru_cache(maxsize=None)
+def board_lines(size: int) -> List[List[Tuple[int, int]]]:
+    """build_lines, shared by every game on a board of this size"""
+    return LINES if size == GRID_SIZE else build_lines(size)
+
+
+def is_prime(n: int) -> bool:
+    if n < 2:
+        return False
+    if n == 2:
+        return True
+    if n % 2 == 0:
+        return False
+    # Optimized: only check up to sqrt(n)
+    sqrt_n = int(math.sqrt(n)) + 1
+    for i in range(3, sqrt_n, 2):
+        if n % i == 0:
+            return False
+    return True
+
+
+def is_power_of_2(n: int) -> bool:
+    # Optimized bit manipulation
+    return n > 0 and (n & (n - 1)) == 0
+
+
+# ---------------------------------------------------------------------------
+# Pattern registry
+# ---------------------------------------------------------------------------
+
+class Pattern(NamedTuple):
+    """A rule scored on every three consecutive tiles of a line"""
+    name: str
+    points: int
+    predicate: Callable[[int, int, int], bool]
+
+
+PATTERNS: List[Pattern] = []
+
+TILE_RANGE = MAX_TILE - MIN_TILE + 1
+# Compiled registry: points and a bit per matching pattern for every triple
+TRIPLE_POINTS: List[int] = [0] * TILE_RANGE ** 3
+TRIPLE_FLAGS: List[int] = [0] * TILE_RANGE ** 3
+
+
+def triple_index(a: int, b: int, c: int) -> int:
+    return ((a - MIN_TILE) * TILE_RANGE + (b - MIN_TILE)) * TILE_RANGE + (c - MIN_TILE)
+
+
+def compile_patterns():
+    """Rebuild the triple tables from PATTERNS; runs on every registration"""
+    global _triple_tables
+    tiles = range(MIN_TILE, MAX_TILE + 1)
+    for a in tiles:
+        for b in tiles:
+            for c in tiles:
+                points = 0
+                flags = 0
+                for bit, pattern in enumerate(PATTERNS):
+                    if pattern.predicate(a, b, c):
+                        points += pattern.points
+                        flags |= 1 << bit
+                index = triple_index(a, b, c)
+                TRIPLE_POINTS[index] = points
+                TRIPLE_FLAGS[index] = flags
+    check_line_cached.cache_clear()
+    _triple_tables = None
+
+
+def register_pattern(name: str, points: int):
+    """Decorator declaring a pattern; re-registering a name replaces it
+
+    @register_pattern("Perfect Square", 90)
+    def perfect_square(a, b, c):
+        return all(int(x ** 0.5) ** 2 == x for x in (a, b, c))
+    """
+    def register(predicate: Callable[[int, int, int], bool]):
+        pattern = Pattern(name, points, predicate)
+        for i, existing in enumerate(PATTERNS):
+            if existing.name == name:
+                PATTERNS[i] = pattern
+                break
+        else:
+            PATTERNS.append(pattern)
+        compile_patterns()
+        return predicate
+    return register
+
+
+def check_line(line: List[Optional[int]]) -> Tuple[int, List[int]]:
+    """Score one line; returns (points, indices of matched cells)"""
+    numbers = [(i, x) for i, x in enumerate(line) if x is not None and MIN_TILE <= x <= MAX_TILE]
+
+    if len(numbers) < 3:
+        return 0, []
+
+    points = 0
+    matches = set()
+
+    for i in range(len(numbers) - 2):
+        index = triple_index(numbers[i][1], numbers[i+1][1], numbers[i+2][1])
+        if TRIPLE_FLAGS[index]:
+            points += TRIPLE_POINTS[index]
+            matches.update((numbers[i][0], numbers[i+1][0], numbers[i+2][0]))
+
+    return points, list(matches)
+
+
+@lru_cache(maxsize=1 << 16)
+def check_line_cached(line: bytes) -> Tuple[int, Tuple[int, ...]]:
+    """check_line memoized on the line's contents"""
+    points, matches = check_line(line)
+    return points, tuple(matches)
+
+
+def line_geometry(lines: List[List[Tuple[int, int]]],
+                  size: int) -> Tuple[List[slice], Dict[int, List[int]]]:
+    """(Board.values slice per line, line indices through each flat cell)"""
+    slices = [line_slice(line, size) for line in lines]
+    cell_lines: Dict[int, List[int]] = {}
+    for index, line in enumerate(lines):
+        for row, col in line:
+            cell_lines.setdefault(row * size + col, []).append(index)
+    return slices, cell_lines
+
+
+@lru_cache(maxsize=None)
+def board_geometry(size: int) -> Tuple[List[slice], Dict[int, List[int]]]:
+    """line_geometry of board_lines, shared read-only by every game of this size"""
+    return line_geometry(board_lines(size), size)
+
+
+# (packed line bytes, 0 = empty) -> (points, matched indices);
+# check_line_cached or LineTable.score
+LineScorer = Callable[[bytes], Tuple[int, Tuple[int, ...]]]
+
+
+class LineEvaluator:
+    """Incremental check_patterns
+
+    Keeps every line's (points, matched cells) and, after a placement,
+    rescores only the lines running through the placed cell. Totals are
+    identical to a full rescan. Lines are read from Board.values as
+    slices, so a line's cache key is just its packed bytes.
+
+    Pattern and point totals are running sums and matched cells are
+    reference counted per line, so a move costs the lines it touches
+    however large the board is.
+    """
+    def __init__(self, lines: List[List[Tuple[int, int]]], scorer: Optional[LineScorer] = None,
+                 size: int = GRID_SIZE):
+        self.lines = lines
+        self.scorer = scorer or check_line_cached
+        if lines is board_lines(size):
+            self.slices, self.cell_lines = board_geometry(size)
+        else:
+            self.slices, self.cell_lines = line_geometry(lines, size)
+        self.results: List[Tuple[int, Tuple[Tuple[int, int], ...]]] = []
+        self.scoring: Set[int] = set()  # indices of lines with points
+        self.points = 0
+        self.matched: Dict[Tuple[int, int], int] = {}  # cell -> matching lines through it
+        self.reset()
+
+    def reset(self):
+        """Forget all cached lines (an empty board scores nothing)"""
+        self.results = [(0, ())] * len(self.lines)
+        self.scoring = set()
+        self.points = 0
+        self.matched = {}
+
+    def score_line(self, board: Board, index: int):
+        points, matches = self.scorer(bytes(board.values[self.slices[index]]))
+        if matches:
+            line = self.lines[index]
+            self.set_result(index, (points, tuple([line[j] for j in matches])))
+        else:
+            self.set_result(index, (points, ()))
+
+    def set_result(self, index: int, result: Tuple[int, Tuple[Tuple[int, int], ...]]):
+        """Replace a line's (points, matched cells), keeping the totals in step
+
+        Restoring a result saved from results[index] undoes a rescore.
+        """
+        points, cells = result
+        old_points, old_cells = self.results[index]
+        self.points += points - old_points
+        if points > 0:
+            self.scoring.add(index)
+        else:
+            self.scoring.discard(index)
+
+        matched = self.matched
+        for cell in old_cells:
+            if matched[cell] == 1:
+                del matched[cell]
+            else:
+                matched[cell] -= 1
+        for cell in cells:
+            matched[cell] = matched.get(cell, 0) + 1
+        self.results[index] = result
+
+    def rescan(self, board: Board):
+        self.reset()
+        for index in range(len(self.lines)):
+            self.score_line(board, index)
+
+    def update(self, board: Board, row: int, col: int):
+        for index in self.cell_lines[row * board.size + col]:
+            self.score_line(board, index)
+
+    def totals(self) -> Tuple[int, int, Set[Tuple[int, int]]]:
+        """(patterns found, points before combo, matched cells)"""
+        return len(self.scoring), self.points, set(self.matched)
+
+    def payout(self) -> int:
+        """Points the board scores now, combo included, without collecting cells"""
+        patterns_found = len(self.scoring)
+        return self.points * patterns_found if patterns_found > 1 else self.points
+
+    def copy(self) -> "LineEvaluator":
+        clone = LineEvaluator.__new__(LineEvaluator)
+        clone.lines = self.lines
+        clone.scorer = self.scorer
+        clone.slices = self.slices
+        clone.cell_lines = self.cell_lines
+        clone.results = list(self.results)
+        clone.scoring = set(self.scoring)
+        clone.points = self.points
+        clone.matched = dict(self.matched)
+        return clone
+
+
+@register_pattern("Sum of Fifteen", 50)
+def sum_of_fifteen(a: int, b: int, c: int) -> bool:
+    return a + b + c == 15
+
+
+@register_pattern("Prime Product", 75)
+def prime_product(a: int, b: int, c: int) -> bool:
+    return is_prime(a * b * c)
+
+
+@register_pattern("Fibonacci", 100)
+def fibonacci(a: int, b: int, c: int) -> bool:
+    return a + b == c
+
+
+@register_pattern("Powers of Two", 125)
+def powers_of_two(a: int, b: int, c: int) -> bool:
+    return is_power_of_2(a) and is_power_of_2(b) and is_power_of_2(c)
+
+
+def level_for_score(score: int) -> int:
+    return (score // LEVEL_POINTS) + 1
+
+
+class MoveResult(NamedTuple):
+    """Outcome of a single placement"""
+    tile: int
+    points: int
+    combo: int
+    matched: List[Tuple[int, int]]
+    leveled_up: bool
+
+
+class GameEngine:
+    """One game's complete rules state, independent of rendering
+
+    line_scorer replaces the memoized check_line, e.g. with a
+    memory-mapped quantumgrid_linetable.LineTable's score method.
+
+    Every game draws its tiles from its own random stream, so a seed
+    plus the move history reproduces the game exactly.
+
+    size sets a size x size board, up to MAX_GRID_SIZE; line scorers for
+    fixed-length lines (LineTable) only fit the default size.
+    """
+    def __init__(self, line_scorer: Optional[LineScorer] = None, seed: Optional[int] = None,
+                 size: int = GRID_SIZE):
+        if not 3 <= size <= MAX_GRID_SIZE:
+            raise ValueError(f"Board size must be 3 to {MAX_GRID_SIZE}, got {size}")
+        self.board = Board(size)
+        self.next_tiles: List[int] = []
+        self.evaluator = LineEvaluator(board_lines(size), line_scorer, size)
+        self.rng = random.Random()
+        self.seed = 0
+        self.quantum_event = WIDE_QUANTUM_EVENT if is_wide(size) else QUANTUM_EVENT
+        self.history = new_history(size)
+        self.reset(seed)
+
+    def reset(self, seed: Optional[int] = None):
+        """Start a new game; a fresh random seed is chosen unless one is given"""
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.history = new_history(self.board.size)
+        self.board.clear()
+        self.evaluator.reset()
+        self.score = 0
+        self.level = 1
+        self.moves_remaining = START_MOVES
+        self.quantum_energy = START_QUANTUM_ENERGY
+        self.combo_count = 0
+        self.moves_used = 0  # tiles placed
+        self.combos = 0  # moves that scored more than one pattern
+        self.game_over_reason = ""
+        self.generate_next_tiles()
+
+    def generate_next_tiles(self):
+        self.next_tiles = [self.rng.randint(MIN_TILE, MAX_TILE) for _ in range(PREVIEW_SIZE)]
+
+    @property
+    def is_over(self) -> bool:
+        return bool(self.game_over_reason)
+
+    def is_board_full(self) -> bool:
+        """Check if the board has no empty cells"""
+        return self.board.is_full()
+
+    def copy(self) -> "GameEngine":
+        """Independent clone for search and simulation"""
+        clone = GameEngine.__new__(GameEngine)
+        clone.__dict__.update(self.__dict__)
+        clone.board = self.board.copy()
+        clone.next_tiles = list(self.next_tiles)
+        clone.evaluator = self.evaluator.copy()
+        clone.rng = random.Random()
+        clone.rng.setstate(self.rng.getstate())
+        clone.history = self.history[:]
+        return clone
+
+    def place(self, row: int, col: int, collect: bool = True) -> Optional[MoveResult]:
+        """Place the current tile; returns None if the move is not legal
+
+        collect=False leaves the result's matched cells empty, sparing
+        headless playback (replays, simulations) the per-move set.
+        """
+        if self.is_over:
+            return None
+
+        size = self.board.size
+        if not (0 <= row < size and 0 <= col < size):
+            return None
+
+        if not self.board.is_empty(row, col):
+            return None
+
+        if not self.next_tiles:
+            return None
+
+        current = self.next_tiles.pop(0)
+        self.board.set(row, col, current)
+        self.next_tiles.append(self.rng.randint(MIN_TILE, MAX_TILE))
+        self.history.append(row * size + col)
+
+        self.moves_remaining -= 1
+        self.moves_used += 1
+
+        if collect:
+            points, matched = self.check_patterns(row, col)
+        else:
+            self.evaluator.update(self.board, row, col)
+            self.combo_count = len(self.evaluator.scoring)
+            points, matched = self.evaluator.payout(), ()
+        if self.combo_count > 1:
+            self.combos += 1
+        leveled_up = self.apply_points(points)
+
+        # Check for game over conditions
+        if self.moves_remaining <= 0:
+            self.game_over_reason = REASON_NO_MOVES
+        elif self.is_board_full():
+            self.game_over_reason = REASON_BOARD_FULL
+
+        return MoveResult(current, points, self.combo_count, list(matched), leveled_up)
+
+    def check_patterns(self, row: Optional[int] = None,
+                       col: Optional[int] = None) -> Tuple[int, Set[Tuple[int, int]]]:
+        """Score every line on the board; returns (points incl. combo, matched cells)
+
+        With the placed cell given only the lines through it are rescored,
+        the rest come from the evaluator's cache.
+        """
+        if row is None or col is None:
+            self.evaluator.rescan(self.board)
+        else:
+            self.evaluator.update(self.board, row, col)
+        patterns_found, total_points, matched_cells = self.evaluator.totals()
+
+        self.combo_count = patterns_found
+        if patterns_found > 1:
+            total_points *= patterns_found
+
+        return total_points, matched_cells
+
+    def apply_points(self, points: int) -> bool:
+        """Add points and handle level-up; returns True if a level was gained"""
+        if points <= 0:
+            return False
+
+        self.score += points
+
+        new_level = level_for_score(self.score)
+        if new_level > self.level:
+            self.level = new_level
+            self.moves_remaining += LEVEL_BONUS_MOVES
+            self.quantum_energy = min(MAX_QUANTUM_ENERGY, self.quantum_energy + 1)
+            return True
+        return False
+
+    def use_quantum_power(self) -> bool:
+        if self.quantum_energy > 0 and not self.is_over:
+            self.quantum_energy -= 1
+            self.moves_remaining += QUANTUM_BONUS_MOVES
+            self.history.append(self.quantum_event)
+            return True
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Batched simulation (NumPy)
+# ---------------------------------------------------------------------------
+
+REASON_CODES = ("", REASON_NO_MOVES, REASON_BOARD_FULL)
+
+_triple_tables = None
+_line_index = None
+_cell_line_index = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The batched QuantumGrid API requires NumPy (pip install numpy)")
+
+
+def triple_tables():
+    """(points, flags) as (10, 10, 10) arrays indexed by tile value; 0 means empty"""
+    global _triple_tables
+    if _triple_tables is None:
+        _require_numpy()
+        size = MAX_TILE + 1
+        points = np.zeros((size,) * 3, dtype=np.int64)
+        flags = np.zeros((size,) * 3, dtype=np.int64)
+        tiles = slice(MIN_TILE, MAX_TILE + 1)
+        shape = (TILE_RANGE,) * 3
+        points[tiles, tiles, tiles] = np.array(TRIPLE_POINTS, dtype=np.int64).reshape(shape)
+        flags[tiles, tiles, tiles] = np.array(TRIPLE_FLAGS, dtype=np.int64).reshape(shape)
+        _triple_tables = (points, flags)
+    return _triple_tables
+
+
+def line_index():
+    """(16, 7) flat cell indices of every line in LINES"""
+    global _line_index
+    if _line_index is None:
+        _require_numpy()
+        _line_index = np.array([[r * GRID_SIZE + c for r, c in line] for line in LINES], dtype=np.intp)
+    return _line_index
+
+
+def cell_line_index():
+    """(49, 4) line numbers through each cell, padded with len(LINES)"""
+    global _cell_line_index
+    if _cell_line_index is None:
+        _require_numpy()
+        table = np.full((GRID_SIZE * GRID_SIZE, 4), len(LINES), dtype=np.intp)
+        counts = [0] * (GRID_SIZE * GRID_SIZE)
+        for number, line in enumerate(LINES):
+            for r, c in line:
+                cell = r * GRID_SIZE + c
+                table[cell, counts[cell]] = number
+                counts[cell] += 1
+        _cell_line_index = table
+    return _cell_line_index
+
+
+def _pack_lines(lines):
+    """Move each line's tiles to its front, keeping their order
+
+    Returns (packed, positions): packed is (..., L) with the empties at
+    the end, so consecutive entries are exactly check_line's consecutive
+    numbers; positions gives each cell's packed index, L for empties.
+    """
+    length = lines.shape[-1]
+    filled = lines > 0
+    positions = np.where(filled, np.cumsum(filled, axis=-1, dtype=np.intp) - 1, length)
+    flat = lines.reshape(-1, length)
+    rows = flat.shape[0]
+    # One spare column per line takes the empties
+    packed = np.zeros((rows, length + 1), dtype=np.intp)
+    packed[np.arange(rows)[:, None], positions.reshape(rows, length)] = flat
+    return packed[:, :length].reshape(lines.shape), positions
+
+
+def _triple_points(packed):
+    points_table, _ = triple_tables()
+    return points_table[packed[..., :-2], packed[..., 1:-1], packed[..., 2:]].sum(axis=-1)
+
+
+def line_points(lines):
+    """Points of score_lines alone, skipping the matched cells"""
+    packed, _ = _pack_lines(np.asarray(lines))
+    return _triple_points(packed)
+
+
+def score_lines(lines):
+    """Vectorized check_line over (..., L) int lines with 0 for empty cells
+
+    Returns (points, matched) with shapes (...) and (..., L).
+    """
+    lines = np.asarray(lines)
+    packed, positions = _pack_lines(lines)
+    points = _triple_points(packed)
+
+    _, flags_table = triple_tables()
+    hit = flags_table[packed[..., :-2], packed[..., 1:-1], packed[..., 2:]] > 0
+    shape = packed.shape[:-1] + (packed.shape[-1] + 1,)
+    hit_packed = np.zeros(shape, dtype=bool)  # the spare last entry stays False for empties
+    hit_packed[..., :-3] |= hit
+    hit_packed[..., 1:-2] |= hit
+    hit_packed[..., 2:-1] |= hit
+
+    matched = np.take_along_axis(hit_packed, positions, axis=-1)
+    return points, matched
+
+
+def score_boards(boards):
+    """Vectorized check_patterns over (M, 7, 7) boards with 0 for empty cells
+
+    Returns (points incl. combo, patterns found, matched cells as (M, 7, 7) bool).
+    """
+    boards = np.asarray(boards)
+    m = boards.shape[0]
+    flat = boards.reshape(m, GRID_SIZE * GRID_SIZE)
+    index = line_index()
+
+    line_points, line_matched = score_lines(flat[:, index])
+    patterns = (line_points > 0).sum(axis=1)
+    total = line_points.sum(axis=1)
+    total = np.where(patterns > 1, total * patterns, total)
+
+    matched = np.zeros(flat.shape, dtype=bool)
+    for i in range(len(LINES)):
+        matched[:, index[i]] |= line_matched[:, i]
+    return total, patterns, matched.reshape(boards.shape)
+
+
+class BatchEngine:
+    """N independent games stepped together with NumPy
+
+    boards is an (N, 7, 7) int8 array where 0 means empty. Actions are
+    flat cell indices (row * 7 + col) or QUANTUM_ACTION; illegal actions
+    and actions for finished games are ignored.
+    """
+    QUANTUM_ACTION = GRID_SIZE * GRID_SIZE
+
+    def __init__(self, n: int, seed: Optional[int] = None):
+        _require_numpy()
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.zeros((n, GRID_SIZE, GRID_SIZE), dtype=np.int8)
+        self.next_tiles = np.zeros((n, PREVIEW_SIZE), dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.moves_remaining = np.zeros(n, dtype=np.int64)
+        self.quantum_energy = np.zeros(n, dtype=np.int64)
+        self.combo_count = np.zeros(n, dtype=np.int64)
+        self.reason = np.zeros(n, dtype=np.int8)  # index into REASON_CODES
+        # Cached points per line plus an always-empty padding line, so a
+        # step only rescores the lines through the placed cell
+        self.line_points = np.zeros((n, len(LINES) + 1), dtype=np.int64)
+        self._line_cells = np.vstack([line_index(), np.full((1, GRID_SIZE), GRID_SIZE * GRID_SIZE)])
+        self.reset()
+
+    @property
+    def over(self):
+        return self.reason > 0
+
+    def reset(self, mask=None):
+        """Start new games for every board, or only where mask is True"""
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        count = int(np.count_nonzero(mask))
+        if count == 0:
+            return
+        self.boards[mask] = 0
+        self.next_tiles[mask] = self.rng.integers(MIN_TILE, MAX_TILE + 1, size=(count, PREVIEW_SIZE))
+        self.score[mask] = 0
+        self.level[mask] = 1
+        self.moves_remaining[mask] = START_MOVES
+        self.quantum_energy[mask] = START_QUANTUM_ENERGY
+        self.combo_count[mask] = 0
+        self.reason[mask] = 0
+        self.line_points[mask] = 0
+
+    def legal_mask(self):
+        """(N, 50) bool: empty cells plus quantum power, False for finished games"""
+        flat = self.boards.reshape(self.n, -1)
+        legal = np.empty((self.n, self.QUANTUM_ACTION + 1), dtype=bool)
+        legal[:, :-1] = flat == 0
+        legal[:, -1] = self.quantum_energy > 0
+        legal &= ~self.over[:, None]
+        return legal
+
+    def step(self, actions, tiles=None):
+        """Apply one action per game; returns points scored per game
+
+        tiles, one per game, replaces the random tile drawn after each
+        placement, so games from GameEngine seeds can be replayed.
+        """
+        actions = np.asarray(actions, dtype=np.intp)
+        active = ~self.over
+        points = np.zeros(self.n, dtype=np.int64)
+
+        quantum = active & (actions == self.QUANTUM_ACTION) & (self.quantum_energy > 0)
+        self.quantum_energy[quantum] -= 1
+        self.moves_remaining[quantum] += QUANTUM_BONUS_MOVES
+
+        flat = self.boards.reshape(self.n, -1)
+        cells = np.clip(actions, 0, self.QUANTUM_ACTION - 1)
+        place = active & (actions >= 0) & (actions < self.QUANTUM_ACTION)
+        place &= flat[np.arange(self.n), cells] == 0
+        idx = np.flatnonzero(place)
+        if idx.size == 0:
+            return points
+
+        flat[idx, cells[idx]] = self.next_tiles[idx, 0]
+        self.next_tiles[idx, :-1] = self.next_tiles[idx, 1:]
+        if tiles is None:
+            self.next_tiles[idx, -1] = self.rng.integers(MIN_TILE, MAX_TILE + 1, size=idx.size)
+        else:
+            self.next_tiles[idx, -1] = np.asarray(tiles)[idx]
+        self.moves_remaining[idx] -= 1
+
+        # Gather the (up to four) lines through each placed cell; the padding
+        # line reads an extra always-empty cell
+        touched = cell_line_index()[cells[idx]]
+        padded = np.zeros((idx.size, GRID_SIZE * GRID_SIZE + 1), dtype=self.boards.dtype)
+        padded[:, :-1] = flat[idx]
+        rows = np.arange(idx.size)[:, None, None]
+        self.line_points[idx[:, None], touched] = line_points(padded[rows, self._line_cells[touched]])
+
+        scored = self.line_points[idx, :-1]
+        patterns = (scored > 0).sum(axis=1)
+        gained = scored.sum(axis=1)
+        gained = np.where(patterns > 1, gained * patterns, gained)
+        points[idx] = gained
+        self.combo_count[idx] = patterns
+        self.score[idx] += gained
+
+        new_level = self.score[idx] // LEVEL_POINTS + 1
+        up = new_level > self.level[idx]
+        self.level[idx] = np.maximum(self.level[idx], new_level)
+        self.moves_remaining[idx] += LEVEL_BONUS_MOVES * up
+        self.quantum_energy[idx] = np.minimum(MAX_QUANTUM_ENERGY, self.quantum_energy[idx] + up)
+
+        no_moves = self.moves_remaining[idx] <= 0
+        full = (flat[idx] != 0).all(axis=1)
+        self.reason[idx] = np.where(no_moves, 1, np.where(full, 2, 0))
+        return points
+
+    def game_over_reasons(self) -> List[str]:
+        return [REASON_CODES[r] for r in self.reason]
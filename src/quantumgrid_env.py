@@ -0,0 +1,188 @@
+"""
+QuantumGrid reinforcement-learning environments - Gym-style, no pygame
+
+QuantumGridEnv wraps one GameEngine with the Gym reset/step API:
+
+    observation  Observation(board, next_tiles, moves_remaining, quantum_energy);
+                 board is the cells row by row as bytes, 0 for empty
+    action       a flat cell index (row * size + col) or quantum_action
+                 (size * size) for quantum power
+    reward       the points the move scored, as check_patterns computes them
+    terminated   the game is over; truncated is always False
+
+VectorQuantumGridEnv steps N 7x7 games in one call on the NumPy
+BatchEngine. Observations are dicts of (N, ...) arrays, finished games
+are reset automatically (their last observation and score are in the
+step's info), and legal_mask() gives the action mask: empty cells plus
+quantum power while energy is left.
+
+Illegal actions (an occupied cell, quantum power without energy) are
+ignored and score nothing, as in BatchEngine; mask them out.
+
+Usage:
+    env = QuantumGridEnv(seed=1)
+    observation, info = env.reset()
+    observation, reward, terminated, truncated, info = env.step(24)
+
+    envs = VectorQuantumGridEnv(4096, seed=1)
+    observations, info = envs.reset()
+    observations, rewards, terminated, truncated, info = envs.step(actions)
+
+    python quantumgrid_env.py --envs 4096 --steps 1000
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import quantumgrid_engine as engine
+from quantumgrid_engine import GameEngine, BatchEngine, GRID_SIZE
+
+
+class Observation(NamedTuple):
+    board: bytes
+    next_tiles: Tuple[int, ...]
+    moves_remaining: int
+    quantum_energy: int
+
+
+class QuantumGridEnv:
+    """One game with the Gym reset/step API"""
+    def __init__(self, seed: Optional[int] = None, size: int = GRID_SIZE):
+        self.game = GameEngine(seed=seed, size=size)
+        self.size = size
+        self.action_count = size * size + 1
+        self.quantum_action = size * size
+        self._seed = seed
+
+    def observation(self) -> Observation:
+        game = self.game
+        return Observation(bytes(game.board.values), tuple(game.next_tiles),
+                           game.moves_remaining, game.quantum_energy)
+
+    def info(self) -> Dict:
+        game = self.game
+        return {'score': game.score, 'level': game.level, 'combo': game.combo_count,
+                'game_over_reason': game.game_over_reason}
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[Observation, Dict]:
+        """Start a new game; without a seed the first reset uses the constructor's"""
+        if seed is None:
+            seed, self._seed = self._seed, None
+        self.game.reset(seed)
+        return self.observation(), self.info()
+
+    def legal_mask(self) -> List[bool]:
+        """One flag per action: empty cells, then quantum power"""
+        game = self.game
+        if game.is_over:
+            return [False] * self.action_count
+        mask = [not value for value in game.board.values]
+        mask.append(game.quantum_energy > 0)
+        return mask
+
+    def step(self, action: int) -> Tuple[Observation, int, bool, bool, Dict]:
+        game = self.game
+        reward = 0
+        if action == self.quantum_action:
+            game.use_quantum_power()
+        elif 0 <= action < self.quantum_action:
+            result = game.place(*divmod(action, self.size))
+            if result is not None:
+                reward = result.points
+        return self.observation(), reward, game.is_over, False, self.info()
+
+
+class VectorQuantumGridEnv:
+    """N 7x7 games stepped together on BatchEngine, with auto-reset"""
+    def __init__(self, n: int, seed: Optional[int] = None):
+        engine._require_numpy()
+        self.n = n
+        self.quantum_action = BatchEngine.QUANTUM_ACTION
+        self.action_count = self.quantum_action + 1
+        self.batch = BatchEngine(n, seed=seed)
+
+    def observation(self) -> Dict:
+        """Copies of the batch's state, so later steps do not change them"""
+        batch = self.batch
+        return {'board': batch.boards.copy(), 'next_tiles': batch.next_tiles.copy(),
+                'moves_remaining': batch.moves_remaining.copy(),
+                'quantum_energy': batch.quantum_energy.copy()}
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[Dict, Dict]:
+        if seed is not None:
+            self.batch.rng = engine.np.random.default_rng(seed)
+        self.batch.reset()
+        return self.observation(), {}
+
+    def legal_mask(self):
+        """(N, 50) bool action mask"""
+        return self.batch.legal_mask()
+
+    def step(self, actions) -> Tuple[Dict, object, object, object, Dict]:
+        """Apply one action per game; finished games restart before returning
+
+        info holds 'final_observation', 'final_score' and 'final_level' for
+        the games that ended, aligned with the terminated mask.
+        """
+        np = engine.np
+        batch = self.batch
+        rewards = batch.step(actions)
+        terminated = batch.over.copy()
+        info = {}
+        if terminated.any():
+            info['final_observation'] = {key: value[terminated]
+                                         for key, value in self.observation().items()}
+            info['final_score'] = batch.score[terminated]
+            info['final_level'] = batch.level[terminated]
+            batch.reset(terminated)
+        return self.observation(), rewards, terminated, np.zeros(self.n, dtype=bool), info
+
+
+def random_actions(legal, rng):
+    """One uniformly random legal action per row of an (N, A) mask"""
+    np = engine.np
+    keys = np.where(legal, rng.random(legal.shape), -1.0)
+    return keys.argmax(axis=1)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Time random agents in the QuantumGrid environments")
+    parser.add_argument('--envs', type=int, default=4096, help="games stepped together")
+    parser.add_argument('--steps', type=int, default=1000, help="steps per game")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scalar', action='store_true',
+                        help="step one QuantumGridEnv instead (no NumPy needed)")
+    args = parser.parse_args(argv)
+
+    episodes = 0
+    if args.scalar:
+        env = QuantumGridEnv(seed=args.seed)
+        rng = random.Random(args.seed)
+        env.reset()
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            actions = [a for a, legal in enumerate(env.legal_mask()) if legal]
+            _, _, terminated, _, _ = env.step(rng.choice(actions))
+            if terminated:
+                episodes += 1
+                env.reset()
+        steps = args.steps
+    else:
+        envs = VectorQuantumGridEnv(args.envs, seed=args.seed)
+        rng = engine.np.random.default_rng(args.seed + 1)
+        envs.reset()
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            _, _, terminated, _, _ = envs.step(random_actions(envs.legal_mask(), rng))
+            episodes += int(terminated.sum())
+        steps = args.steps * args.envs
+    elapsed = time.perf_counter() - start
+
+    print(f"{steps:,} steps, {episodes:,} games finished in {elapsed:.2f}s: "
+          f"{steps / elapsed:,.0f} steps/s")
+
+
+if __name__ == "__main__":
+    main()
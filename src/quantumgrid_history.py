@@ -0,0 +1,214 @@
+"""
+QuantumGrid game history - every finished game in a local SQLite database
+
+Games are queued by the UI and inserted in batches on a background
+thread, one transaction per batch, so recording a game never waits on
+the disk. The table is indexed for the queries the game makes: best
+scores overall, per day and per player, each answered from an index
+in milliseconds however many games are stored.
+
+Usage:
+    history = GameHistory(Path("quantumgrid_history.db"))
+    history.add(record_game(engine, "alice", duration))
+    best = history.top(10, player="alice")
+    history.close()
+
+    python quantumgrid_history.py top quantumgrid_history.db --limit 20 --day 2026-10-18
+"""
+
+import argparse
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from quantumgrid_engine import GameEngine
+
+BATCH_SIZE = 500
+BATCH_WAIT = 1.0  # seconds a queued game may wait for others to share its insert
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    finished_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    moves_used INTEGER NOT NULL,
+    combos INTEGER NOT NULL,
+    game_over_reason TEXT NOT NULL,
+    duration REAL NOT NULL,
+    seed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_score ON games (score DESC);
+CREATE INDEX IF NOT EXISTS games_by_day ON games (day, score DESC);
+CREATE INDEX IF NOT EXISTS games_by_player ON games (player, score DESC);
+"""
+
+COLUMNS = ('player', 'finished_at', 'score', 'level', 'moves_used', 'combos',
+           'game_over_reason', 'duration', 'seed')
+
+
+class GameRecord(NamedTuple):
+    player: str
+    finished_at: float  # Unix time
+    score: int
+    level: int
+    moves_used: int
+    combos: int
+    game_over_reason: str
+    duration: float  # seconds
+    seed: int
+
+    @property
+    def day(self) -> str:
+        """Local calendar day the game finished, YYYY-MM-DD"""
+        return time.strftime('%Y-%m-%d', time.localtime(self.finished_at))
+
+
+def record_game(game: GameEngine, player: str, duration: float,
+                finished_at: Optional[float] = None) -> GameRecord:
+    """Capture a finished game's result"""
+    return GameRecord(player, time.time() if finished_at is None else finished_at,
+                      game.score, game.level, game.moves_used, game.combos,
+                      game.game_over_reason, duration, game.seed)
+
+
+# Seeds are unsigned 64-bit; SQLite integers are signed
+def _to_signed(seed: int) -> int:
+    return seed - (1 << 64) if seed >= 1 << 63 else seed
+
+
+def _from_signed(seed: int) -> int:
+    return seed + (1 << 64) if seed < 0 else seed
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=10)
+    # Readers don't block the writer thread and a commit needs no full sync
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class GameHistory:
+    """Finished games in SQLite; inserts are batched on a background thread"""
+    def __init__(self, path: Path, batch_size: int = BATCH_SIZE, batch_wait: float = BATCH_WAIT):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.errors = 0
+        self.last_error: Optional[sqlite3.Error] = None
+
+        # Queries run on the caller's connection, inserts on the writer's
+        self.conn = _connect(path)
+        self.conn.executescript(SCHEMA)
+        self._queue: "queue.Queue[Optional[GameRecord]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='quantumgrid-history', daemon=True)
+        self._thread.start()
+
+    def add(self, record: GameRecord):
+        """Queue a game for insertion; returns immediately"""
+        self._queue.put(record)
+
+    def flush(self):
+        """Wait until every queued game has been inserted"""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self.conn.close()
+
+    def top(self, limit: int = 10, player: Optional[str] = None,
+            day: Optional[str] = None) -> List[GameRecord]:
+        """Best games, optionally for one player and/or one day (YYYY-MM-DD)"""
+        where = []
+        params: list = []
+        if player is not None:
+            where.append("player = ?")
+            params.append(player)
+        if day is not None:
+            where.append("day = ?")
+            params.append(day)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM games"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY score DESC LIMIT ?"
+        params.append(limit)
+        rows = self.conn.execute(sql, params).fetchall()
+        return [GameRecord(*row[:-1], _from_signed(row[-1])) for row in rows]
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def _run(self):
+        conn = _connect(self.path)
+        closing = False
+        while not closing:
+            first = self._queue.get()
+            batch = []
+            if first is None:
+                closing = True
+            else:
+                batch.append(first)
+            # Gather what else arrives within batch_wait into the same transaction
+            deadline = time.monotonic() + self.batch_wait
+            while not closing and len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    closing = True
+                else:
+                    batch.append(record)
+            self._insert(conn, batch)
+            for _ in range(len(batch) + closing):
+                self._queue.task_done()
+        conn.close()
+
+    def _insert(self, conn: sqlite3.Connection, batch: List[GameRecord]):
+        if not batch:
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO games (player, finished_at, day, score, level, moves_used, "
+                    "combos, game_over_reason, duration, seed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(r.player, r.finished_at, r.day, r.score, r.level, r.moves_used, r.combos,
+                      r.game_over_reason, r.duration, _to_signed(r.seed)) for r in batch])
+        except sqlite3.Error as e:
+            self.errors += 1
+            self.last_error = e
+            print(f"Could not record {len(batch)} game(s) in {self.path}: {e}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Query the QuantumGrid game history")
+    sub = parser.add_subparsers(dest='command', required=True)
+    top_cmd = sub.add_parser('top', help="list the best games")
+    top_cmd.add_argument('database')
+    top_cmd.add_argument('--limit', type=int, default=10)
+    top_cmd.add_argument('--player')
+    top_cmd.add_argument('--day', help="YYYY-MM-DD")
+    args = parser.parse_args(argv)
+
+    history = GameHistory(Path(args.database))
+    start = time.perf_counter()
+    games = history.top(args.limit, args.player, args.day)
+    elapsed = time.perf_counter() - start
+    print(f"  {'#':>3} {'player':<16} {'score':>12} {'level':>5} {'moves':>5} {'combos':>6} "
+          f"{'time':>7}  day")
+    for rank, game in enumerate(games, 1):
+        print(f"  {rank:>3} {game.player:<16} {game.score:>12,} {game.level:>5} "
+              f"{game.moves_used:>5} {game.combos:>6} {game.duration:>6.0f}s  {game.day}")
+    print(f"\n{len(games)} of {history.count():,} games ({elapsed * 1000:.1f} ms)")
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+QuantumGrid line table - precomputed check_line for every possible line
+
+A 7-cell line has 10^7 configurations (empty or 1-9 per cell). This
+module scores all of them once and writes a compact file:
+
+    header   24 bytes  magic, version, line length, rules fingerprint
+    points   uint16 little-endian per line
+    masks    uint8 per line, bit i set when cell i is part of a pattern
+
+Lines are indexed as base-10 numbers, one digit per cell with 0 for
+empty. LineTable memory-maps the file read-only, so any number of worker
+processes share one copy through the OS page cache, and scoring a line
+becomes a single index lookup.
+
+Usage:
+    python quantumgrid_linetable.py build [--output PATH]
+    python quantumgrid_linetable.py info [PATH]
+
+    table = LineTable()
+    engine = GameEngine(line_scorer=table.score)
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Sequence
+
+import quantumgrid_engine as engine
+
+LINE_LENGTH = 7
+LINE_COUNT = 10 ** LINE_LENGTH
+MAGIC = b"QGLT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBBH16s")
+
+DEFAULT_PATH = Path(__file__).with_name("quantumgrid_lines.bin")
+
+# Matched cell indices for every 7-bit mask
+MASK_CELLS: List[Tuple[int, ...]] = [
+    tuple(i for i in range(LINE_LENGTH) if mask & (1 << i)) for mask in range(1 << LINE_LENGTH)
+]
+
+
+class LineTableError(Exception):
+    """The table file is missing, corrupt or was built for other rules"""
+
+
+def rules_fingerprint() -> bytes:
+    """Digest of the compiled pattern registry (points and match per triple)
+
+    Tables built under different pattern rules are rejected on load.
+    """
+    digest = hashlib.md5()
+    for points, flags in zip(engine.TRIPLE_POINTS, engine.TRIPLE_FLAGS):
+        digest.update(struct.pack("<i?", points, bool(flags)))
+    return digest.digest()
+
+
+def line_index(line: Sequence[Optional[int]]) -> int:
+    """A line's table position: its values as a base-10 number, 0 for empty"""
+    index = 0
+    for value in line:
+        index = index * 10 + (value or 0)
+    return index
+
+
+def build(path: Path = DEFAULT_PATH, chunk: int = 1_000_000) -> Path:
+    """Score every line with the vectorized engine and write the table atomically"""
+    engine._require_numpy()
+    np = engine.np
+
+    points = np.empty(LINE_COUNT, dtype="<u2")
+    masks = np.empty(LINE_COUNT, dtype=np.uint8)
+    weights = 10 ** np.arange(LINE_LENGTH - 1, -1, -1, dtype=np.int64)
+    bits = (1 << np.arange(LINE_LENGTH)).astype(np.uint8)
+
+    for start in range(0, LINE_COUNT, chunk):
+        stop = min(LINE_COUNT, start + chunk)
+        digits = (np.arange(start, stop, dtype=np.int64)[:, None] // weights) % 10
+        chunk_points, chunk_matched = engine.score_lines(digits)
+        if chunk_points.max() > 0xFFFF:
+            raise LineTableError("Line points do not fit in 16 bits")
+        points[start:stop] = chunk_points
+        masks[start:stop] = (chunk_matched * bits).sum(axis=1)
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, LINE_LENGTH, 0, rules_fingerprint()))
+        f.write(points.tobytes())
+        f.write(masks.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+class LineTable:
+    """Read-only memory-mapped view of a built line table"""
+    def __init__(self, path: Path = DEFAULT_PATH):
+        if sys.byteorder != "little":
+            raise LineTableError("Line tables are little-endian; this host is not")
+        self.path = Path(path)
+        try:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise LineTableError(f"Cannot map {self.path}: {e}") from e
+
+        expected_size = HEADER.size + LINE_COUNT * 3
+        if len(self._mmap) != expected_size:
+            self._mmap.close()
+            raise LineTableError(f"{self.path} has size {len(self._mmap)}, expected {expected_size}")
+
+        magic, version, length, _, fingerprint = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or length != LINE_LENGTH:
+            self._mmap.close()
+            raise LineTableError(f"{self.path} is not a v{FORMAT_VERSION} line table")
+        if fingerprint != rules_fingerprint():
+            self._mmap.close()
+            raise LineTableError(f"{self.path} was built for different pattern rules; rebuild it")
+
+        view = memoryview(self._mmap)
+        points_end = HEADER.size + LINE_COUNT * 2
+        self.points = view[HEADER.size:points_end].cast("H")
+        self.masks = view[points_end:]
+
+    def lookup(self, index: int) -> Tuple[int, int]:
+        """(points, match mask) for a line index"""
+        return self.points[index], self.masks[index]
+
+    def score(self, line: Sequence[Optional[int]]) -> Tuple[int, Tuple[int, ...]]:
+        """Drop-in for check_line_cached on 7-cell lines"""
+        index = line_index(line)
+        return self.points[index], MASK_CELLS[self.masks[index]]
+
+    def check_line(self, line: List[Optional[int]]) -> Tuple[int, List[int]]:
+        """Same result as quantumgrid_engine.check_line, by table lookup"""
+        points, cells = self.score(line)
+        return points, list(cells)
+
+    def close(self):
+        self.points.release()
+        self.masks.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build or inspect the QuantumGrid line table")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="score all 10^7 lines and write the table")
+    build_cmd.add_argument("--output", type=Path, default=DEFAULT_PATH)
+    info_cmd = sub.add_parser("info", help="validate a table and print its size")
+    info_cmd.add_argument("path", type=Path, nargs="?", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        path = build(args.output)
+        print(f"Wrote {path} ({path.stat().st_size / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s")
+    else:
+        try:
+            with LineTable(args.path) as table:
+                print(f"{table.path}: {LINE_COUNT:,} lines, rules fingerprint OK")
+        except LineTableError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
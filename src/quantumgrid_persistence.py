@@ -0,0 +1,139 @@
+"""
+QuantumGrid persistence - debounced, atomic file writes off the UI thread
+
+SaveWriter takes the latest bytes for a file and writes them on a
+background thread. Writes to the same file within the debounce window
+are coalesced, so a run of high-score updates costs one disk write, and
+a stalled disk never blocks a frame. Every write goes to a temporary
+file that is then renamed over the target, so a crash mid-write leaves
+the previous save intact. Failures are reported, not swallowed.
+
+Usage:
+    writer = SaveWriter()
+    writer.write(Path("save.json"), data)   # returns immediately
+    writer.remove(Path("old.bin"))          # queued like a write
+    writer.flush(wait=False)                # start pending writes now
+    writer.close()                          # write everything and stop
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_DEBOUNCE = 0.5  # seconds without a newer write before writing
+MAX_DELAY = 2.0  # a file written continuously is still saved this often
+
+
+def write_atomic(path: Path, data: bytes):
+    """Write data to a temporary file and rename it over path"""
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def report_error(path: Path, error: OSError):
+    print(f"Could not save {path}: {error}")
+
+
+class SaveWriter:
+    """Background writer that coalesces rapid writes to the same file"""
+    def __init__(self, debounce: float = DEFAULT_DEBOUNCE, max_delay: float = MAX_DELAY,
+                 on_error: Callable[[Path, OSError], None] = report_error):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.on_error = on_error
+        # path -> (data or None to delete, first queued, due); guarded by _cond
+        self._pending: Dict[Path, Tuple[Optional[bytes], float, float]] = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+
+        self.writes = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_error: Optional[OSError] = None
+
+        self._thread = threading.Thread(target=self._run, name='quantumgrid-save', daemon=True)
+        self._thread.start()
+
+    def write(self, path: Path, data: Optional[bytes]):
+        """Queue data as the new content of path (None deletes it); returns immediately"""
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("SaveWriter is closed")
+            first = now
+            if path in self._pending:
+                self.coalesced += 1
+                first = self._pending[path][1]
+            due = min(now + self.debounce, first + self.max_delay)
+            self._pending[path] = (data, first, due)
+            self._cond.notify()
+
+    def remove(self, path: Path):
+        """Queue deletion of path, replacing any pending write to it"""
+        self.write(path, None)
+
+    def flush(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
+        """Write everything pending now; optionally wait until it is on disk
+
+        Returns False if the wait timed out.
+        """
+        with self._cond:
+            for path, (data, first, _) in self._pending.items():
+                self._pending[path] = (data, first, 0.0)
+            self._cond.notify_all()
+            if not wait:
+                return True
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Flush, then stop the writer thread"""
+        done = self.flush(timeout=timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return done
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch = self._take_due()
+                while not batch:
+                    if self._closed and not self._pending:
+                        return
+                    timeout = None
+                    if self._pending:
+                        timeout = max(0.0, min(due for _, _, due in self._pending.values())
+                                      - time.monotonic())
+                    self._cond.wait(timeout)
+                    batch = self._take_due()
+                self._busy = True
+
+            for path, data in batch:
+                try:
+                    if data is None:
+                        if path.exists():
+                            path.unlink()
+                    else:
+                        write_atomic(path, data)
+                    self.writes += 1
+                except OSError as e:
+                    self.errors += 1
+                    self.last_error = e
+                    self.on_error(path, e)
+
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _take_due(self) -> List[Tuple[Path, Optional[bytes]]]:
+        now = time.monotonic()
+        due = [path for path, (_, _, when) in self._pending.items() if when <= now]
+        return [(path, self._pending.pop(path)[0]) for path in due]
@@ -0,0 +1,297 @@
+"""
+QuantumGrid move replays - compact binary game logs and headless playback
+
+A replay is the game's seed plus its move history, one event per move
+(a flat cell index row * size + col, or quantum power), with the final
+score, level and game over reason appended for verification:
+
+    header   magic b"QGRP", version, board size, seed (uint64)
+    events   v1: one byte each, 0xFF for quantum power (boards up to 15x15)
+             v2: uint16 little-endian each, 0xFFFF for quantum power
+    footer   score (uint64), level (uint32), reason code (uint8)
+
+A typical 7x7 game is well under 100 bytes. Many replays can be stored in
+one file as length-prefixed records (write_replays / read_replays).
+
+With NumPy installed, verify checks 7x7 replays thousands at a time on
+BatchEngine (verify_batch), feeding it the tiles each seed draws.
+
+Usage:
+    data = encode(record(game))
+    python quantumgrid_replay.py record games.qgr --games 10000
+    python quantumgrid_replay.py record big.qgr --games 100 --size 31
+    python quantumgrid_replay.py verify games.qgr
+    python quantumgrid_replay.py verify games.qgr --batch-size 0   # one at a time
+"""
+
+import argparse
+import random
+import struct
+import sys
+import time
+from array import array
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import quantumgrid_engine as engine
+from quantumgrid_engine import (BatchEngine, GameEngine, GRID_SIZE, MIN_TILE, MAX_TILE,
+                                PREVIEW_SIZE, QUANTUM_EVENT, REASON_CODES, is_wide)
+
+MAGIC = b"QGRP"
+FORMAT_VERSION = 1  # one-byte events
+WIDE_FORMAT_VERSION = 2  # two-byte events, for boards over 15x15
+HEADER = struct.Struct("<4sBBQ")
+FOOTER = struct.Struct("<QIB")
+RECORD_LENGTH = struct.Struct("<H")
+BATCH_SIZE = 4096  # 7x7 replays verified together on BatchEngine
+
+
+class ReplayError(Exception):
+    """The replay is malformed or does not reproduce its recorded result"""
+
+
+class Replay(NamedTuple):
+    seed: int
+    events: Sequence[int]  # bytes, or array('H') on boards over 15x15
+    score: int
+    level: int
+    game_over_reason: str
+    size: int = GRID_SIZE
+
+
+def record(game: GameEngine) -> Replay:
+    """Capture a game's seed, history and current result
+
+    A game resumed from a snapshot has no history before the snapshot
+    and cannot be recorded.
+    """
+    placed = len(game.history) - sum(1 for event in game.history if event == game.quantum_event)
+    if placed != game.moves_used:
+        raise ReplayError(f"History has {placed} of the game's {game.moves_used} moves")
+    events = game.history[:] if is_wide(game.board.size) else bytes(game.history)
+    return Replay(game.seed, events, game.score, game.level, game.game_over_reason,
+                  game.board.size)
+
+
+def encode(replay: Replay) -> bytes:
+    if is_wide(replay.size):
+        version = WIDE_FORMAT_VERSION
+        events = array('H', replay.events)
+        if sys.byteorder != 'little':
+            events.byteswap()
+        events = events.tobytes()
+    else:
+        version = FORMAT_VERSION
+        events = bytes(replay.events)
+    return b"".join((
+        HEADER.pack(MAGIC, version, replay.size, replay.seed),
+        events,
+        FOOTER.pack(replay.score, replay.level, REASON_CODES.index(replay.game_over_reason)),
+    ))
+
+
+def decode(data: bytes) -> Replay:
+    if len(data) < HEADER.size + FOOTER.size:
+        raise ReplayError("Replay is truncated")
+    magic, version, size, seed = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version not in (FORMAT_VERSION, WIDE_FORMAT_VERSION):
+        raise ReplayError(f"Not a v{FORMAT_VERSION} or v{WIDE_FORMAT_VERSION} QuantumGrid replay")
+    if (version == WIDE_FORMAT_VERSION) != is_wide(size):
+        raise ReplayError(f"A {size}x{size} board's replay cannot be v{version}")
+    score, level, reason = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+    if reason >= len(REASON_CODES):
+        raise ReplayError(f"Unknown game over reason code {reason}")
+    events = data[HEADER.size:len(data) - FOOTER.size]
+    if version == WIDE_FORMAT_VERSION:
+        if len(events) % 2:
+            raise ReplayError("Replay is truncated")
+        events = array('H', events)
+        if sys.byteorder != 'little':
+            events.byteswap()
+    return Replay(seed, events, score, level, REASON_CODES[reason], size)
+
+
+def play(replay: Replay, game: Optional[GameEngine] = None) -> GameEngine:
+    """Re-run a replay headlessly and return the resulting game"""
+    if game is None:
+        game = GameEngine(size=replay.size)
+    elif game.board.size != replay.size:
+        raise ReplayError(f"Replay is for a {replay.size}x{replay.size} board, "
+                          f"engine uses {game.board.size}x{game.board.size}")
+    game.reset(replay.seed)
+    size = game.board.size
+    for event in replay.events:
+        if event == game.quantum_event:
+            applied = game.use_quantum_power()
+        else:
+            applied = game.place(event // size, event % size, collect=False) is not None
+        if not applied:
+            raise ReplayError(f"Event {event} is illegal at move {len(game.history) + 1}")
+    return game
+
+
+def mismatch(replay: Replay, actual) -> Optional[str]:
+    expected = (replay.score, replay.level, replay.game_over_reason)
+    if actual != expected:
+        return f"Replay of seed {replay.seed} ended with {actual}, recorded {expected}"
+    return None
+
+
+def verify(replay: Replay, game: Optional[GameEngine] = None):
+    """Raise ReplayError unless the replay reproduces its recorded result"""
+    game = play(replay, game)
+    error = mismatch(replay, (game.score, game.level, game.game_over_reason))
+    if error:
+        raise ReplayError(error)
+
+
+def verify_batch(replays: List[Replay]) -> List[Optional[str]]:
+    """verify for many 7x7 replays at once on BatchEngine (needs NumPy)
+
+    Returns the error message for each replay, None where it reproduced.
+    """
+    np = engine.np
+    n = len(replays)
+    if n == 0:
+        return []
+    steps = max(len(replay.events) for replay in replays)
+    # Event t of every game, -1 once a game has no more; and the tile
+    # each placement draws from the game's own random stream
+    actions = np.full((steps, n), -1, dtype=np.intp)
+    tiles = np.zeros((steps, n), dtype=np.int8)
+    batch = BatchEngine(n)
+    for i, replay in enumerate(replays):
+        if replay.size != GRID_SIZE:
+            raise ReplayError(f"Batched replays are {GRID_SIZE}x{GRID_SIZE}, "
+                              f"got {replay.size}x{replay.size}")
+        rng = random.Random(replay.seed)
+        batch.next_tiles[i] = [rng.randint(MIN_TILE, MAX_TILE) for _ in range(PREVIEW_SIZE)]
+        events = np.frombuffer(bytes(replay.events), dtype=np.uint8)
+        placed = events != QUANTUM_EVENT
+        column = actions[:len(events), i]
+        column[:] = np.where(placed, events, BatchEngine.QUANTUM_ACTION)
+        tiles[:len(events), i][placed] = [rng.randint(MIN_TILE, MAX_TILE)
+                                          for _ in range(int(placed.sum()))]
+
+    errors: List[Optional[str]] = [None] * n
+    failed = np.zeros(n, dtype=bool)
+    games = np.arange(n)
+    for t in range(steps):
+        step_actions = actions[t]
+        pending = step_actions >= 0
+        legal = batch.legal_mask()[games, np.where(pending, step_actions, 0)]
+        for i in np.flatnonzero(pending & ~legal & ~failed):
+            errors[i] = f"Event {replays[i].events[t]} is illegal at move {t + 1}"
+        failed |= pending & ~legal
+        batch.step(np.where(failed, -1, step_actions), tiles[t])
+
+    reasons = batch.game_over_reasons()
+    for i in np.flatnonzero(~failed):
+        errors[i] = mismatch(replays[i], (int(batch.score[i]), int(batch.level[i]), reasons[i]))
+    return errors
+
+
+def write_replays(f: BinaryIO, replays: List[Replay]):
+    """Append replays as length-prefixed records"""
+    for replay in replays:
+        data = encode(replay)
+        f.write(RECORD_LENGTH.pack(len(data)))
+        f.write(data)
+
+
+def read_replays(f: BinaryIO) -> Iterator[Replay]:
+    while True:
+        prefix = f.read(RECORD_LENGTH.size)
+        if not prefix:
+            return
+        if len(prefix) < RECORD_LENGTH.size:
+            raise ReplayError("Truncated replay record")
+        (length,) = RECORD_LENGTH.unpack(prefix)
+        data = f.read(length)
+        if len(data) < length:
+            raise ReplayError("Truncated replay record")
+        yield decode(data)
+
+
+def record_random_games(path: str, games: int, seed: int, size: int = GRID_SIZE):
+    """Write a regression corpus of random-policy games"""
+    rng = random.Random(seed)
+    game = GameEngine(size=size)
+    with open(path, "wb") as f:
+        for _ in range(games):
+            game.reset(rng.getrandbits(64))
+            while not game.is_over:
+                if game.moves_remaining <= 1 and game.quantum_energy > 0:
+                    game.use_quantum_power()
+                cell = rng.choice(list(game.board.empty_cells()))
+                game.place(cell // game.board.size, cell % game.board.size, collect=False)
+            write_replays(f, [record(game)])
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Record or verify QuantumGrid replays")
+    sub = parser.add_subparsers(dest="command", required=True)
+    record_cmd = sub.add_parser("record", help="write a corpus of seeded random games")
+    record_cmd.add_argument("output")
+    record_cmd.add_argument("--games", type=int, default=1000)
+    record_cmd.add_argument("--seed", type=int, default=0)
+    record_cmd.add_argument("--size", type=int, default=GRID_SIZE, help="board size")
+    verify_cmd = sub.add_parser("verify", help="replay every game and check its result")
+    verify_cmd.add_argument("files", nargs="+")
+    verify_cmd.add_argument("--line-table", help="score lines from a built line table")
+    verify_cmd.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help="7x7 replays checked together on BatchEngine "
+                                 "(needs NumPy; 0 checks one at a time)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record_random_games(args.output, args.games, args.seed, args.size)
+        print(f"Recorded {args.games:,} games to {args.output}")
+        return
+
+    line_scorer = None
+    if args.line_table:
+        from quantumgrid_linetable import LineTable
+        line_scorer = LineTable(args.line_table).score
+    batch_size = args.batch_size if engine.np is not None else 0
+    games: Dict[int, GameEngine] = {}  # one engine per board size; the table fits only 7x7
+    checked = 0
+    failures = 0
+    start = time.perf_counter()
+    for path in args.files:
+        pending: List[Replay] = []
+
+        def report(errors: List[Optional[str]]):
+            nonlocal checked, failures
+            for error in errors:
+                if error:
+                    failures += 1
+                    print(f"{path}: {error}")
+            checked += len(errors)
+
+        with open(path, "rb") as f:
+            for replay in read_replays(f):
+                if batch_size > 0 and replay.size == GRID_SIZE:
+                    pending.append(replay)
+                    if len(pending) >= batch_size:
+                        report(verify_batch(pending))
+                        pending = []
+                    continue
+                game = games.get(replay.size)
+                if game is None:
+                    scorer = line_scorer if replay.size == GRID_SIZE else None
+                    game = games[replay.size] = GameEngine(scorer, size=replay.size)
+                try:
+                    verify(replay, game)
+                    report([None])
+                except ReplayError as e:
+                    report([str(e)])
+        report(verify_batch(pending))
+    elapsed = time.perf_counter() - start
+    rate = checked / elapsed if elapsed > 0 else 0.0
+    print(f"Verified {checked:,} replays ({rate:,.0f}/s), {failures} mismatches")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
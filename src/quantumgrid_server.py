@@ -0,0 +1,458 @@
+"""
+QuantumGrid game server - many headless games in one asyncio process
+
+Thin clients play over TCP with one JSON object per line. Every request
+gets exactly one response, in order, on the same connection:
+
+    {"op": "new", "size": 7, "seed": 42}     start a game; size and seed optional
+    {"op": "place", "session": 1, "row": 3, "col": 4}
+    {"op": "quantum", "session": 1}          spend quantum energy for +5 moves
+    {"op": "state", "session": 1}            the board and counters
+    {"op": "end", "session": 1}              drop the game
+    {"op": "stats"}                          server load
+
+Responses carry "ok": true and the game's counters (score, level,
+moves_remaining, quantum_energy, next_tiles, game_over_reason), or
+"ok": false and an "error". An "id" in a request is echoed back. Games
+use GameEngine, so the rules are exactly those of the desktop game.
+Games belong to the connection that started them and end with it; one
+connection (a web gateway, say) can run many.
+
+Backpressure: a connection's requests are handled one at a time and
+the server stops answering whenever more than WRITE_BUFFER bytes of
+responses are unsent, so a client that stops reading stops being
+served instead of filling the server's memory. Request lines, games
+per connection, games in total and the memory of each game are capped;
+idle connections are closed.
+
+The load generator plays random games against a server and reports
+move latency percentiles and how many sessions one server core carries.
+
+Usage:
+    python quantumgrid_server.py serve --port 7711
+    python quantumgrid_server.py load --port 7711 --sessions 2000 --connections 20 --moves 100000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional
+
+from quantumgrid_engine import GameEngine, GRID_SIZE, MAX_GRID_SIZE
+from quantumgrid_tournament import QuantileSketch
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7711
+MAX_LINE = 4096  # bytes in one request
+READ_SIZE = 64 * 1024  # request bytes read and answered per batch
+WRITE_BUFFER = 64 * 1024  # unsent response bytes per connection before drain() waits
+MAX_SESSIONS = 20000
+MAX_SESSIONS_PER_CONNECTION = 5000
+SESSION_MEMORY = 256 * 1024  # bytes one game may use, board and move history included
+IDLE_TIMEOUT = 300.0  # seconds without a request before a connection is closed
+
+
+class RequestError(Exception):
+    """A request the server refuses; the message is sent to the client"""
+
+
+@lru_cache(maxsize=None)
+def game_footprint(size: int) -> int:
+    """Bytes a new game on a size x size board allocates, measured once per size
+
+    Line tables shared by every game of the size are built first, so
+    they are not counted.
+    """
+    GameEngine(size=size)
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = [GameEngine(size=size) for _ in range(8)]
+    used = (tracemalloc.get_traced_memory()[0] - before) // len(games)
+    if not tracing:
+        tracemalloc.stop()
+    del games
+    return used
+
+
+class Session:
+    """One game being played over the network"""
+    __slots__ = ('id', 'game', 'footprint')
+
+    def __init__(self, session_id: int, game: GameEngine):
+        self.id = session_id
+        self.game = game
+        self.footprint = game_footprint(game.board.size)
+
+    def memory(self) -> int:
+        """Estimated bytes in use: the new game's footprint plus its move history"""
+        return self.footprint + sys.getsizeof(self.game.history)
+
+
+def is_integer(value) -> bool:
+    """A JSON integer; true and false are bools, which Python counts as ints"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def counters(game: GameEngine) -> Dict:
+    return {
+        'score': game.score,
+        'level': game.level,
+        'moves_remaining': game.moves_remaining,
+        'quantum_energy': game.quantum_energy,
+        'next_tiles': game.next_tiles,
+        'game_over_reason': game.game_over_reason,
+    }
+
+
+def board_state(session: Session) -> Dict:
+    game = session.game
+    return dict(session=session.id, size=game.board.size, board=list(game.board.values),
+                **counters(game))
+
+
+class GameServer:
+    """Sessions and limits; requests are answered by respond()"""
+    def __init__(self, max_sessions: int = MAX_SESSIONS,
+                 max_sessions_per_connection: int = MAX_SESSIONS_PER_CONNECTION,
+                 session_memory: int = SESSION_MEMORY, idle_timeout: float = IDLE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.max_sessions_per_connection = max_sessions_per_connection
+        self.session_memory = session_memory
+        self.idle_timeout = idle_timeout
+
+        self.sessions = 0
+        self.connections = 0
+        self.moves = 0
+        self.requests = 0
+        self.started = time.monotonic()
+        self._next_id = 1
+
+    def respond(self, line: bytes, owned: Dict[int, Session]) -> bytes:
+        """Answer one request line for a connection owning `owned` sessions"""
+        self.requests += 1
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                raise RequestError("Request is not valid JSON")
+            if not isinstance(request, dict):
+                raise RequestError("Request must be a JSON object")
+            request_id = request.get('id')
+            response = self.handle(request, owned)
+            response['ok'] = True
+        except RequestError as e:
+            response = {'ok': False, 'error': str(e)}
+        except Exception as e:  # a bug must not take the other sessions down with it
+            print(f"Error handling {line[:200]!r}: {e!r}")
+            response = {'ok': False, 'error': "Internal server error"}
+        if request_id is not None:
+            response['id'] = request_id
+        return json.dumps(response, separators=(',', ':')).encode() + b"\n"
+
+    def handle(self, request: Dict, owned: Dict[int, Session]) -> Dict:
+        op = request.get('op')
+        if op == 'new':
+            return self.new_session(request, owned)
+        if op == 'stats':
+            return self.stats()
+
+        session_id = request.get('session')
+        if not is_integer(session_id):
+            raise RequestError("session must be an integer")
+        session = owned.get(session_id)
+        if session is None:
+            raise RequestError("Unknown session")
+        game = session.game
+        if op == 'place':
+            row, col = request.get('row'), request.get('col')
+            if not is_integer(row) or not is_integer(col):
+                raise RequestError("place needs integer row and col")
+            if session.memory() > self.session_memory:
+                raise RequestError("Session memory limit reached")
+            result = game.place(row, col)
+            if result is None:
+                raise RequestError("Game over" if game.is_over else "Cell is taken or off the board")
+            self.moves += 1
+            return dict(tile=result.tile, points=result.points, combo=result.combo,
+                        matched=result.matched, leveled_up=result.leveled_up, **counters(game))
+        if op == 'quantum':
+            return dict(used=game.use_quantum_power(), **counters(game))
+        if op == 'state':
+            return board_state(session)
+        if op == 'end':
+            self.end_session(session, owned)
+            return {}
+        raise RequestError(f"Unknown op {op!r}")
+
+    def new_session(self, request: Dict, owned: Dict[int, Session]) -> Dict:
+        size = request.get('size', GRID_SIZE)
+        seed = request.get('seed')
+        if not is_integer(size) or not 3 <= size <= MAX_GRID_SIZE:
+            raise RequestError(f"size must be an integer from 3 to {MAX_GRID_SIZE}")
+        if seed is not None and not (is_integer(seed) and 0 <= seed < 1 << 64):
+            raise RequestError("seed must be an unsigned 64-bit integer")
+        if self.sessions >= self.max_sessions:
+            raise RequestError("Server is full")
+        if len(owned) >= self.max_sessions_per_connection:
+            raise RequestError("Too many sessions on this connection")
+        if game_footprint(size) > self.session_memory:
+            raise RequestError(f"A {size}x{size} board exceeds the session memory limit")
+
+        session = Session(self._next_id, GameEngine(seed=seed, size=size))
+        self._next_id += 1
+        owned[session.id] = session
+        self.sessions += 1
+        return board_state(session)
+
+    def end_session(self, session: Session, owned: Dict[int, Session]):
+        del owned[session.id]
+        self.sessions -= 1
+
+    def stats(self) -> Dict:
+        return {
+            'sessions': self.sessions,
+            'connections': self.connections,
+            'moves': self.moves,
+            'requests': self.requests,
+            'uptime': time.monotonic() - self.started,
+            'cpu': time.process_time(),
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER)
+        self.connections += 1
+        owned: Dict[int, Session] = {}
+        partial = b""
+        try:
+            while True:
+                # Whatever has arrived: a pipelining client's requests are
+                # answered as one batch
+                try:
+                    data = await asyncio.wait_for(reader.read(READ_SIZE), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not data:
+                    break
+                *lines, partial = (partial + data).split(b"\n")
+                too_long = len(partial) > MAX_LINE
+                for line in lines:
+                    if len(line) > MAX_LINE:
+                        too_long = True
+                        break
+                    if line.strip():
+                        writer.write(self.respond(line, owned))
+                        # Large responses (state of a big board) must not pile up
+                        if writer.transport.get_write_buffer_size() > WRITE_BUFFER:
+                            await writer.drain()
+                if too_long:
+                    writer.write(b'{"ok":false,"error":"Request too long"}\n')
+                    break
+                # Don't read more requests until the client has taken these responses
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            self.sessions -= len(owned)
+            owned.clear()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"QuantumGrid server on {addresses}")
+        async with server:
+            await server.serve_forever()
+
+
+class LoadClient:
+    """One connection of the load generator; requests are pipelined, answers come in order"""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.waiting: Deque[asyncio.Future] = deque()
+        self._reader_task = asyncio.ensure_future(self._read())
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "LoadClient":
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+        return cls(reader, writer)
+
+    async def request(self, **request) -> Dict:
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.append(future)
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        response = await future
+        if not response['ok']:
+            raise RequestError(response['error'])
+        return response
+
+    async def _read(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                future = self.waiting.popleft()
+                if not future.done():
+                    future.set_result(json.loads(line))
+        except ConnectionError:
+            pass
+        finally:
+            while self.waiting:
+                future = self.waiting.popleft()
+                if not future.done():
+                    future.set_exception(ConnectionError("Server closed the connection"))
+
+    async def close(self):
+        self.writer.close()
+        await self._reader_task
+
+
+class LoadReport:
+    def __init__(self):
+        self.latency = QuantileSketch()
+        self.max_latency = 0.0
+        self.moves = 0
+        self.games = 0
+        self.errors = 0
+
+    def add(self, seconds: float):
+        self.latency.add(seconds)
+        self.max_latency = max(self.max_latency, seconds)
+        self.moves += 1
+
+
+async def play_session(client: LoadClient, moves: int, size: int, think: float,
+                       rng: random.Random, report: LoadReport):
+    """Play random games on one session until `moves` tiles have been placed"""
+    played = 0
+    while played < moves:
+        state = await client.request(op='new', size=size, seed=rng.getrandbits(64))
+        report.games += 1
+        empty = [i for i, value in enumerate(state['board']) if not value]
+        while played < moves and not state['game_over_reason']:
+            if state['moves_remaining'] <= 1 and state['quantum_energy'] > 0:
+                state.update(await client.request(op='quantum', session=state['session']))
+            cell = empty.pop(rng.randrange(len(empty)))
+            start = time.perf_counter()
+            result = await client.request(op='place', session=state['session'],
+                                          row=cell // size, col=cell % size)
+            report.add(time.perf_counter() - start)
+            state.update(result)
+            played += 1
+            if think:
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+        await client.request(op='end', session=state['session'])
+
+
+async def run_load(host: str, port: int, sessions: int, connections: int, moves: int,
+                   size: int = GRID_SIZE, think: float = 0.0, seed: int = 0) -> Dict:
+    clients = [await LoadClient.connect(host, port) for _ in range(connections)]
+    report = LoadReport()
+    rng = random.Random(seed)
+    before = await clients[0].request(op='stats')
+    start = time.perf_counter()
+
+    per_session = [moves // sessions + (i < moves % sessions) for i in range(sessions)]
+    await asyncio.gather(*(play_session(clients[i % connections], per_session[i], size, think,
+                                        random.Random(rng.getrandbits(64)), report)
+                           for i in range(sessions)))
+
+    elapsed = time.perf_counter() - start
+    after = await clients[0].request(op='stats')
+    for client in clients:
+        await client.close()
+
+    cpu = after['cpu'] - before['cpu']
+    return {
+        'sessions': sessions,
+        'connections': connections,
+        'moves': report.moves,
+        'games': report.games,
+        'seconds': elapsed,
+        'moves_per_second': report.moves / elapsed if elapsed > 0 else 0.0,
+        'latency_ms': {f"p{round(q * 100)}": report.latency.quantile(q) * 1000
+                       for q in (0.50, 0.95, 0.99)},
+        'max_latency_ms': report.max_latency * 1000,
+        'server_cpu_seconds': cpu,
+        'server_cpu_per_move_us': cpu / report.moves * 1e6 if report.moves else 0.0,
+        # Sessions one fully busy server core would carry at this move rate
+        'sessions_per_core': sessions * elapsed / cpu if cpu > 0 else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="QuantumGrid game server and load generator")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve_cmd = sub.add_parser('serve', help="host games over TCP")
+    serve_cmd.add_argument('--host', default=DEFAULT_HOST)
+    serve_cmd.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_cmd.add_argument('--max-sessions', type=int, default=MAX_SESSIONS)
+    serve_cmd.add_argument('--max-sessions-per-connection', type=int,
+                           default=MAX_SESSIONS_PER_CONNECTION)
+    serve_cmd.add_argument('--session-memory', type=int, default=SESSION_MEMORY // 1024,
+                           metavar='KB', help="memory one game may use")
+    serve_cmd.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT, metavar='SECONDS')
+
+    load_cmd = sub.add_parser('load', help="play random games against a server")
+    load_cmd.add_argument('--host', default=DEFAULT_HOST)
+    load_cmd.add_argument('--port', type=int, default=DEFAULT_PORT)
+    load_cmd.add_argument('--sessions', type=int, default=1000, help="games played at once")
+    load_cmd.add_argument('--connections', type=int, default=10)
+    load_cmd.add_argument('--moves', type=int, default=100000, help="tiles placed in total")
+    load_cmd.add_argument('--size', type=int, default=GRID_SIZE, help="board size")
+    load_cmd.add_argument('--think', type=float, default=0.0, metavar='SECONDS',
+                          help="mean pause between a session's moves")
+    load_cmd.add_argument('--seed', type=int, default=0)
+    load_cmd.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        server = GameServer(args.max_sessions, args.max_sessions_per_connection,
+                            args.session_memory * 1024, args.idle_timeout)
+        try:
+            asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    connections = max(1, min(args.connections, args.sessions))
+    try:
+        report = asyncio.run(run_load(args.host, args.port, args.sessions, connections,
+                                      args.moves, args.size, args.think, args.seed))
+    except (OSError, RequestError) as e:
+        print(f"Load test failed: {e}")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    latency = report['latency_ms']
+    print(f"  {report['sessions']:,} sessions on {report['connections']} connections, "
+          f"{report['moves']:,} moves in {report['seconds']:.1f}s "
+          f"({report['moves_per_second']:,.0f} moves/s, {report['games']:,} games)")
+    print(f"  Move latency: p50 {latency['p50']:.2f} ms  p95 {latency['p95']:.2f} ms  "
+          f"p99 {latency['p99']:.2f} ms  max {report['max_latency_ms']:.2f} ms")
+    print(f"  Server CPU: {report['server_cpu_seconds']:.1f}s, "
+          f"{report['server_cpu_per_move_us']:.0f} us per move")
+    print(f"  ~{report['sessions_per_core']:,.0f} sessions per core at this move rate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+QuantumGrid snapshots - a game in progress in a few dozen bytes
+
+A snapshot is enough to resume a game exactly where it stopped:
+
+    header   magic b"QGSN", version, board size
+    counters seed (uint64), tiles drawn (uint32), score (uint64),
+             level, moves remaining, moves used, combos (uint32),
+             quantum energy, combo count, game over reason code (uint8),
+             seconds played (float32)
+    tiles    the next tiles, then every cell, two 4-bit values per byte
+
+The random stream is not stored: restoring reseeds it and discards the
+tiles already drawn, so the tiles that come next are unchanged. A 7x7
+game is 76 bytes however many moves were played; 101x101 is 5,152.
+
+The move history is not stored either (a replay file keeps that), so a
+restored game's history starts empty. v1 and v2 snapshots, which also
+carried the history, still restore with it:
+
+             v1: uint16 length, one byte per move (boards up to 15x15)
+             v2: uint32 length, uint16 little-endian per move
+
+Usage:
+    data = encode(game, seconds_played)
+    seconds_played = restore(data, game)
+"""
+
+import struct
+import sys
+from array import array
+from typing import Optional
+
+from quantumgrid_engine import (GameEngine, MIN_TILE, MAX_TILE, PREVIEW_SIZE, REASON_CODES,
+                                is_wide)
+
+MAGIC = b"QGSN"
+FORMAT_VERSION = 3  # no move history
+HISTORY_FORMAT_VERSION = 1  # older, with one-byte moves
+WIDE_FORMAT_VERSION = 2  # older, with two-byte moves, for boards over 15x15
+HEADER = struct.Struct("<4sBB")
+COUNTERS = struct.Struct("<QIQIIIIBBBf")
+HISTORY_LENGTH = struct.Struct("<H")
+WIDE_HISTORY_LENGTH = struct.Struct("<I")
+
+
+class SnapshotError(Exception):
+    """The snapshot is malformed or does not fit this engine"""
+
+
+def pack_nibbles(values) -> bytes:
+    """Two values 0-15 per byte, low nibble first; odd lengths are padded with 0"""
+    values = bytes(values)
+    if len(values) % 2:
+        values += b"\0"
+    return bytes(low | high << 4 for low, high in zip(values[::2], values[1::2]))
+
+
+def unpack_nibbles(data: bytes, count: int) -> bytes:
+    values = bytearray(len(data) * 2)
+    values[::2] = bytes(b & 0x0F for b in data)
+    values[1::2] = bytes(b >> 4 for b in data)
+    return bytes(values[:count])
+
+
+def tiles_drawn(game: GameEngine) -> int:
+    """Values taken from the game's random stream: the first preview, then one per tile placed"""
+    return PREVIEW_SIZE + game.moves_used
+
+
+def encode(game: GameEngine, seconds_played: float = 0.0) -> bytes:
+    return b"".join((
+        HEADER.pack(MAGIC, FORMAT_VERSION, game.board.size),
+        COUNTERS.pack(game.seed, tiles_drawn(game), game.score, game.level,
+                      game.moves_remaining, game.moves_used, game.combos, game.quantum_energy,
+                      game.combo_count, REASON_CODES.index(game.game_over_reason), seconds_played),
+        pack_nibbles(game.next_tiles),
+        pack_nibbles(game.board.values),
+    ))
+
+
+def restore(data: bytes, game: Optional[GameEngine] = None) -> float:
+    """Load a snapshot into game (reset in place); returns the seconds played"""
+    if game is None:
+        game = GameEngine()
+    if len(data) < HEADER.size + COUNTERS.size:
+        raise SnapshotError("Snapshot is truncated")
+    magic, version, size = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version not in (FORMAT_VERSION, HISTORY_FORMAT_VERSION,
+                                         WIDE_FORMAT_VERSION):
+        raise SnapshotError(f"Not a v1-v{FORMAT_VERSION} QuantumGrid snapshot")
+    if size != game.board.size:
+        raise SnapshotError(f"Snapshot is of a {size}x{size} board, engine uses "
+                            f"{game.board.size}x{game.board.size}")
+    wide = version == WIDE_FORMAT_VERSION
+    if version != FORMAT_VERSION and wide != is_wide(size):
+        raise SnapshotError(f"A {size}x{size} board's snapshot cannot be v{version}")
+    (seed, drawn, score, level, moves_remaining, moves_used, combos, quantum_energy,
+     combo_count, reason, seconds_played) = COUNTERS.unpack_from(data, HEADER.size)
+    if reason >= len(REASON_CODES):
+        raise SnapshotError(f"Unknown game over reason code {reason}")
+
+    offset = HEADER.size + COUNTERS.size
+    tiles_length = (PREVIEW_SIZE + 1) // 2
+    cells_length = (size * size + 1) // 2
+    end = offset + tiles_length + cells_length
+    if len(data) < end:
+        raise SnapshotError("Snapshot is truncated")
+    next_tiles = unpack_nibbles(data[offset:offset + tiles_length], PREVIEW_SIZE)
+    offset += tiles_length
+    cells = unpack_nibbles(data[offset:offset + cells_length], size * size)
+    history = None
+    if version != FORMAT_VERSION:
+        history = read_history(data, end, wide)
+    if any(v and not MIN_TILE <= v <= MAX_TILE for v in cells + next_tiles):
+        raise SnapshotError("Snapshot has tile values out of range")
+
+    game.reset(seed)
+    for _ in range(drawn - PREVIEW_SIZE):  # the first preview was drawn by reset
+        game.rng.randint(MIN_TILE, MAX_TILE)
+    game.board.load(cells)
+    game.evaluator.rescan(game.board)
+    game.next_tiles = list(next_tiles)
+    if history is not None:
+        game.history = history
+    game.score = score
+    game.level = level
+    game.moves_remaining = moves_remaining
+    game.moves_used = moves_used
+    game.combos = combos
+    game.quantum_energy = quantum_energy
+    game.combo_count = combo_count
+    game.game_over_reason = REASON_CODES[reason]
+    return seconds_played
+
+
+def read_history(data: bytes, offset: int, wide: bool):
+    """The move history of a v1 or v2 snapshot, starting at offset"""
+    length = WIDE_HISTORY_LENGTH if wide else HISTORY_LENGTH
+    if len(data) < offset + length.size:
+        raise SnapshotError("Snapshot is truncated")
+    (history_length,) = length.unpack_from(data, offset)
+    offset += length.size
+    event_size = 2 if wide else 1
+    history = data[offset:offset + history_length * event_size]
+    if len(history) != history_length * event_size:
+        raise SnapshotError("Snapshot is truncated")
+    if not wide:
+        return bytearray(history)
+    history = array('H', history)
+    if sys.byteorder != 'little':
+        history.byteswap()
+    return history
@@ -0,0 +1,334 @@
+"""
+QuantumGrid tournament runner - parallel Monte Carlo games with streaming statistics
+
+Plays N complete games under a policy, sharding them across a process
+pool. Each shard folds its games into mergeable aggregators (running
+mean/variance, a log-bucket quantile sketch, level histogram and game
+over reasons) and only those aggregators travel back to the parent, so
+memory stays constant however many games are played.
+
+The random policy runs on the NumPy BatchEngine when NumPy is installed;
+greedy and advisor policies play GameEngine games one at a time.
+
+Usage:
+    python quantumgrid_tournament.py --games 1000000 --policy random
+    python quantumgrid.py tournament --games 10000 --policy greedy --workers 8
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import quantumgrid_engine as engine
+from quantumgrid_advisor import Advisor
+from quantumgrid_engine import GameEngine, BatchEngine
+
+POLICIES = ('random', 'greedy', 'advisor')
+DEFAULT_SHARD_SIZE = 1000
+
+
+class RunningStats:
+    """Count, mean, variance, min and max in one pass (Welford); mergeable"""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other: "RunningStats"):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.__dict__.update(other.__dict__)
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """Log-bucketed histogram with bounded relative error; mergeable
+
+    Values v > 0 fall in bucket ceil(log(v) / log(gamma)), so any
+    reported quantile is within `accuracy` of the true value.
+    """
+    def __init__(self, accuracy: float = 0.01):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Counter = Counter()
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, x: float, weight: int = 1):
+        self.count += weight
+        if x <= 0:
+            self.zeros += weight
+        else:
+            self.buckets[math.ceil(math.log(x) / self._log_gamma)] += weight
+
+    def merge(self, other: "QuantileSketch"):
+        self.buckets.update(other.buckets)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class TournamentStats:
+    """Everything reported about a set of games, without keeping the games"""
+    def __init__(self):
+        self.score = RunningStats()
+        self.score_sketch = QuantileSketch()
+        self.moves = RunningStats()
+        self.levels: Counter = Counter()
+        self.reasons: Counter = Counter()
+
+    def add(self, score: int, level: int, moves_used: int, reason: str):
+        self.score.add(score)
+        self.score_sketch.add(score)
+        self.moves.add(moves_used)
+        self.levels[level] += 1
+        self.reasons[reason] += 1
+
+    def merge(self, other: "TournamentStats"):
+        self.score.merge(other.score)
+        self.score_sketch.merge(other.score_sketch)
+        self.moves.merge(other.moves)
+        self.levels.update(other.levels)
+        self.reasons.update(other.reasons)
+
+    def report(self) -> Dict:
+        return {
+            'games': self.score.count,
+            'score': {
+                'mean': self.score.mean,
+                'stdev': self.score.stdev,
+                'min': self.score.min,
+                'max': self.score.max,
+                'p10': self.score_sketch.quantile(0.10),
+                'p50': self.score_sketch.quantile(0.50),
+                'p90': self.score_sketch.quantile(0.90),
+                'p99': self.score_sketch.quantile(0.99),
+            },
+            'moves_used': {'mean': self.moves.mean, 'max': self.moves.max},
+            'levels': dict(sorted(self.levels.items())),
+            'game_over_reasons': dict(self.reasons),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Policies: choose a flat cell index for the current tile
+# ---------------------------------------------------------------------------
+
+Policy = Callable[[GameEngine, random.Random], int]
+
+
+def random_policy(game: GameEngine, rng: random.Random) -> int:
+    return rng.choice(list(game.board.empty_cells()))
+
+
+def make_advisor_policy(depth: int, time_budget: float) -> Policy:
+    advisor = Advisor(workers=0)
+
+    def policy(game: GameEngine, rng: random.Random) -> int:
+        best = advisor.advise(game, time_budget, depth)[0]
+        return best.row * game.board.size + best.col
+    return policy
+
+
+def make_policy(name: str, depth: int = 2, time_budget: float = 0.05) -> Policy:
+    if name == 'random':
+        return random_policy
+    if name == 'greedy':
+        return make_advisor_policy(1, 0.0)
+    if name == 'advisor':
+        return make_advisor_policy(depth, time_budget)
+    raise ValueError(f"Unknown policy {name!r}; choose from {', '.join(POLICIES)}")
+
+
+def play_game(game: GameEngine, policy: Policy, rng: random.Random) -> int:
+    """Play until game over; quantum power is spent when one move is left"""
+    moves_used = 0
+    while not game.is_over:
+        if game.moves_remaining <= 1 and game.quantum_energy > 0:
+            game.use_quantum_power()
+        cell = policy(game, rng)
+        game.place(cell // game.board.size, cell % game.board.size)
+        moves_used += 1
+    return moves_used
+
+
+def _run_scalar_shard(policy_name: str, games: int, seed: int, depth: int,
+                      time_budget: float) -> TournamentStats:
+    stats = TournamentStats()
+    policy = make_policy(policy_name, depth, time_budget)
+    rng = random.Random(seed)
+    game = GameEngine()
+    for _ in range(games):
+        game.reset(rng.getrandbits(64))
+        moves_used = play_game(game, policy, rng)
+        stats.add(game.score, game.level, moves_used, game.game_over_reason)
+    return stats
+
+
+def _run_batch_random_shard(games: int, seed: int) -> TournamentStats:
+    np = engine.np
+    stats = TournamentStats()
+    batch = BatchEngine(games, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    moves_used = np.zeros(games, dtype=np.int64)
+    cells = BatchEngine.QUANTUM_ACTION
+
+    while not batch.over.all():
+        legal = batch.legal_mask()
+        keys = np.where(legal[:, :cells], rng.random((games, cells)), -1.0)
+        actions = keys.argmax(axis=1)
+        quantum = (batch.moves_remaining <= 1) & (batch.quantum_energy > 0)
+        actions[quantum] = cells
+        moves_used += ~batch.over & ~quantum
+        batch.step(actions)
+
+    reasons = batch.game_over_reasons()
+    for i in range(games):
+        stats.add(int(batch.score[i]), int(batch.level[i]), int(moves_used[i]), reasons[i])
+    return stats
+
+
+def run_shard(policy_name: str, games: int, seed: int, depth: int = 2,
+              time_budget: float = 0.05) -> TournamentStats:
+    if policy_name == 'random' and engine.np is not None:
+        return _run_batch_random_shard(games, seed)
+    return _run_scalar_shard(policy_name, games, seed, depth, time_budget)
+
+
+def run_tournament(games: int, policy: str = 'random', workers: Optional[int] = None,
+                   shard_size: int = DEFAULT_SHARD_SIZE, seed: int = 0, depth: int = 2,
+                   time_budget: float = 0.05,
+                   progress: Optional[Callable[[int, int], None]] = None) -> TournamentStats:
+    """Play `games` games and return the merged statistics"""
+    make_policy(policy)  # validate before starting workers
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shards = [(policy, min(shard_size, games - start), seed + index, depth, time_budget)
+              for index, start in enumerate(range(0, games, shard_size))]
+
+    total = TournamentStats()
+    if workers <= 1:
+        for shard in shards:
+            total.merge(run_shard(*shard))
+            if progress:
+                progress(total.score.count, games)
+        return total
+
+    with ProcessPoolExecutor(workers) as pool:
+        for future in as_completed([pool.submit(run_shard, *shard) for shard in shards]):
+            total.merge(future.result())
+            if progress:
+                progress(total.score.count, games)
+    return total
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Play many headless QuantumGrid games")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--policy', choices=POLICIES, default='random')
+    parser.add_argument('--workers', type=int, default=None, help="default: one per core")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--depth', type=int, default=2, help="advisor search depth")
+    parser.add_argument('--time-budget', type=float, default=0.05, help="advisor seconds per move")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    def progress(done: int, total: int):
+        print(f"\r  {done:,}/{total:,} games", end='', file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    stats = run_tournament(args.games, args.policy, args.workers, args.shard_size, args.seed,
+                           args.depth, args.time_budget, progress)
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+
+    report = stats.report()
+    report['policy'] = args.policy
+    report['seconds'] = elapsed
+    report['games_per_second'] = report['games'] / elapsed if elapsed > 0 else 0.0
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    score = report['score']
+    print(f"\n{'='*60}")
+    print(f"  {report['games']:,} games, policy '{args.policy}' "
+          f"({elapsed:.1f}s, {report['games_per_second']:,.0f} games/s)")
+    print(f"{'='*60}")
+    print(f"  Score: mean {score['mean']:,.1f}  stdev {score['stdev']:,.1f}  "
+          f"min {score['min']:,.0f}  max {score['max']:,.0f}")
+    print(f"         p10 {score['p10']:,.0f}  p50 {score['p50']:,.0f}  "
+          f"p90 {score['p90']:,.0f}  p99 {score['p99']:,.0f}")
+    print(f"  Moves used: mean {report['moves_used']['mean']:.1f}")
+    print("  Game over reasons:")
+    for reason, count in report['game_over_reasons'].items():
+        print(f"    {reason:<22} {count:,}")
+    print("  Levels reached:")
+    for label, count in level_rows(stats.levels):
+        print(f"    {label:>11} {count:,}")
+
+
+def level_rows(levels: Counter, max_rows: int = 20):
+    """Histogram rows, grouping levels into equal ranges when there are many"""
+    if not levels:
+        return []
+    low, high = min(levels), max(levels)
+    width = max(1, math.ceil((high - low + 1) / max_rows))
+    rows: Counter = Counter()
+    for level, count in levels.items():
+        rows[low + (level - low) // width * width] += count
+    return [(str(start) if width == 1 else f"{start}-{start + width - 1}", rows[start])
+            for start in sorted(rows)]
+
+
+if __name__ == "__main__":
+    main()
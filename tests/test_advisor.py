@@ -0,0 +1,30 @@
+"""The advisor's make/undo must leave its line evaluator as a fresh rescan would"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from quantumgrid_advisor import Advisor, _Search  # noqa: E402
+from quantumgrid_engine import GameEngine  # noqa: E402
+
+
+def evaluator_state(evaluator):
+    return evaluator.results, evaluator.scoring, evaluator.points, evaluator.matched
+
+
+def test_search_restores_evaluator_totals():
+    rng = random.Random(2)
+    game = GameEngine(seed=1)
+    advisor = Advisor(workers=0)
+    for _ in range(15):
+        cell = rng.choice(list(game.board.empty_cells()))
+        game.place(cell // game.board.size, cell % game.board.size)
+        assert advisor.advise(game, time_budget=60.0, max_depth=2)[0].depth == 2
+
+        search: _Search = advisor._local
+        fresh = search.evaluator.copy()
+        fresh.rescan(search.board)
+        assert evaluator_state(search.evaluator) == evaluator_state(fresh)
+        assert bytes(search.board.values) == bytes(game.board.values)